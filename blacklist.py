@@ -1,85 +1,248 @@
 """
 blacklist.py — Maintains a set of known exploiter addresses.
 Sources: data/nonce_events.jsonl (caller field) + data/blacklist_manual.txt
-Auto-refreshes every 60s.
+Auto-refreshes every 60s; only lines appended since the last refresh are parsed.
+With watchdog installed, start_watcher() refreshes on file changes instead of polling.
 """
-import json
 import logging
 import os
 import threading
 import time
 
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # optional — stdlib json also accepts bytes
+    from json import loads as _json_loads  # type: ignore[assignment]
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    from watchdog.observers.polling import PollingObserver
+except ImportError:  # optional — fall back to interval polling
+    FileSystemEventHandler = object
+    Observer = PollingObserver = None
+
 logger = logging.getLogger(__name__)
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 NONCE_EVENTS_FILE = os.path.join(DATA_DIR, "nonce_events.jsonl")
 MANUAL_BLACKLIST_FILE = os.path.join(DATA_DIR, "blacklist_manual.txt")
 REFRESH_INTERVAL = 60
+WATCHED_FILES = {os.path.basename(NONCE_EVENTS_FILE), os.path.basename(MANUAL_BLACKLIST_FILE)}
+
+
+class _BlacklistFileHandler(FileSystemEventHandler):
+    """Calls Blacklist.refresh() when one of the source files changes."""
+
+    def __init__(self, blacklist: "Blacklist"):
+        super().__init__()
+        self._blacklist = blacklist
+
+    def _handle(self, path: str):
+        if os.path.basename(path) in WATCHED_FILES:
+            self._blacklist.refresh()
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._handle(event.src_path)
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._handle(event.src_path)
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self._handle(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self._handle(event.dest_path)
+
+
+def normalize_address(address: str | bytes) -> bytes | None:
+    """Convert a 0x-hex address (any case) or raw bytes to its 20-byte key. None if malformed."""
+    if isinstance(address, (bytes, bytearray)):
+        key = bytes(address)
+    else:
+        address = address.strip()
+        if address[:2] in ("0x", "0X"):
+            address = address[2:]
+        try:
+            key = bytes.fromhex(address)
+        except ValueError:
+            return None
+    return key if len(key) == 20 else None
 
 
 class Blacklist:
     def __init__(self):
-        self._addresses: set[str] = set()
+        # Immutable snapshot of 20-byte address keys, swapped atomically on refresh
+        # so readers never lock
+        self._addresses: frozenset[bytes] = frozenset()
+        self._nonce_addrs: set[bytes] = set()
+        self._manual_addrs: set[bytes] = set()
         self._lock = threading.Lock()
         self._last_refresh = 0.0
+        self._nonce_offset = 0
+        self._nonce_mtime = 0.0
+        self._nonce_ino = 0  # inode the offset belongs to; a new one means the file was rotated
+        self._manual_mtime = 0.0
+        self._observer = None
         self.refresh()
 
-    def refresh(self):
+    def start_watcher(self, polling: bool = False) -> bool:
+        """
+        Refresh on file-change events instead of polling every REFRESH_INTERVAL.
+        Use polling=True for filesystems without inotify (e.g. NFS mounts).
+        Returns False (and keeps interval polling) if watchdog isn't installed.
+        """
+        if self._observer is not None:
+            return True
+        if Observer is None:
+            logger.warning("watchdog not installed — blacklist falls back to 60s polling")
+            return False
+        os.makedirs(DATA_DIR, exist_ok=True)
+        observer = PollingObserver() if polling else Observer()
+        observer.schedule(_BlacklistFileHandler(self), DATA_DIR, recursive=False)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        # Catch anything written between the initial load and the observer starting
+        self.refresh()
+        logger.info(f"Blacklist watcher started on {DATA_DIR} ({type(observer).__name__})")
+        return True
+
+    def stop_watcher(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def _read_nonce_events(self) -> set[bytes] | None:
+        """
+        Parse only the lines appended to nonce_events.jsonl since the last refresh.
+        Returns the new callers, or None if the file is unchanged.
+        """
+        try:
+            f = open(NONCE_EVENTS_FILE, "rb")
+        except FileNotFoundError:
+            return None
+        addrs = set()
+        with f:
+            # fstat the open file, so the inode and size match what is read below
+            st = os.fstat(f.fileno())
+            if (st.st_ino == self._nonce_ino and st.st_mtime == self._nonce_mtime
+                    and st.st_size == self._nonce_offset):
+                return None
+
+            if st.st_ino != self._nonce_ino or st.st_size < self._nonce_offset:
+                # File was replaced (rotated) or truncated — start over
+                if self._nonce_ino:
+                    logger.info(f"{NONCE_EVENTS_FILE} was rotated or truncated, re-reading from start")
+                self._nonce_offset = 0
+                self._nonce_addrs.clear()
+
+            f.seek(self._nonce_offset)
+            offset = self._nonce_offset
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partial line still being written, pick it up next time
+                offset += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = _json_loads(line)
+                except ValueError:  # JSONDecodeError and orjson's error both subclass it
+                    continue
+                # Valid JSON of the wrong shape is skipped too, so the offset always moves past it
+                caller = event.get("caller") if isinstance(event, dict) else None
+                if isinstance(caller, str):
+                    key = normalize_address(caller)
+                    if key:
+                        addrs.add(key)
+        self._nonce_offset = offset
+        self._nonce_mtime = st.st_mtime
+        self._nonce_ino = st.st_ino
+        return addrs
+
+    def _read_manual(self) -> set[bytes] | None:
+        """Re-read blacklist_manual.txt if it changed. Returns None if unchanged."""
+        try:
+            mtime = os.stat(MANUAL_BLACKLIST_FILE).st_mtime
+        except FileNotFoundError:
+            if not self._manual_mtime:
+                return None
+            self._manual_mtime = 0.0
+            return set()
+        if mtime == self._manual_mtime:
+            return None
+
         addrs = set()
+        with open(MANUAL_BLACKLIST_FILE, "r") as f:
+            for line in f:
+                addr = line.strip()
+                if not addr or addr.startswith("#"):
+                    continue
+                key = normalize_address(addr)
+                if key:
+                    addrs.add(key)
+                else:
+                    logger.warning(f"Skipping malformed address in {MANUAL_BLACKLIST_FILE}: {addr}")
+        self._manual_mtime = mtime
+        return addrs
 
-        # nonce_events.jsonl
-        if os.path.exists(NONCE_EVENTS_FILE):
+    def refresh(self):
+        with self._lock:
+            old_count = self.count
+
+            # nonce_events.jsonl (append-only: only parse the new tail)
             try:
-                with open(NONCE_EVENTS_FILE, "r") as f:
-                    for line in f:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        try:
-                            caller = json.loads(line).get("caller", "").strip().lower()
-                            if caller:
-                                addrs.add(caller)
-                        except json.JSONDecodeError:
-                            pass
+                new_nonce = self._read_nonce_events()
             except Exception as e:
                 logger.warning(f"Failed to read {NONCE_EVENTS_FILE}: {e}")
+                new_nonce = None
+            if new_nonce:
+                self._nonce_addrs |= new_nonce
 
-        # Manual blacklist
-        if os.path.exists(MANUAL_BLACKLIST_FILE):
+            # Manual blacklist (small, re-read whole file on change)
             try:
-                with open(MANUAL_BLACKLIST_FILE, "r") as f:
-                    for line in f:
-                        addr = line.strip().lower()
-                        if addr and not addr.startswith("#"):
-                            addrs.add(addr)
+                new_manual = self._read_manual()
             except Exception as e:
                 logger.warning(f"Failed to read {MANUAL_BLACKLIST_FILE}: {e}")
+                new_manual = None
+            if new_manual is not None:
+                self._manual_addrs = new_manual
+
+            if new_nonce is not None or new_manual is not None:
+                self._addresses = frozenset(self._nonce_addrs | self._manual_addrs)
 
-        with self._lock:
-            old_count = len(self._addresses)
-            self._addresses = addrs
             self._last_refresh = time.time()
-            if len(addrs) != old_count:
-                logger.info(f"Blacklist refreshed: {len(addrs)} addresses (was {old_count})")
+            if self.count != old_count:
+                logger.info(f"Blacklist refreshed: {self.count} addresses (was {old_count})")
 
     def _maybe_refresh(self):
         if time.time() - self._last_refresh >= REFRESH_INTERVAL:
             self.refresh()
 
-    def is_blacklisted(self, address: str) -> bool:
-        self._maybe_refresh()
-        with self._lock:
-            return address.strip().lower() in self._addresses
+    def is_blacklisted(self, address: str | bytes) -> bool:
+        """Accepts a 0x-hex string (any case/whitespace) or raw address bytes."""
+        key = normalize_address(address)
+        return key is not None and self.contains_normalized(key)
+
+    def contains_normalized(self, key: bytes) -> bool:
+        """Hot-path lookup for callers that already hold a 20-byte key — no validation."""
+        if self._observer is None:
+            self._maybe_refresh()
+        return key in self._addresses
 
     @property
     def count(self) -> int:
-        with self._lock:
-            return len(self._addresses)
+        return len(self._addresses)
 
     @property
     def addresses(self) -> set[str]:
-        with self._lock:
-            return set(self._addresses)
+        return {"0x" + key.hex() for key in self._addresses}
 
 
 # Module-level singleton
@@ -93,5 +256,5 @@ def get_blacklist() -> Blacklist:
     return _instance
 
 
-def is_blacklisted(address: str) -> bool:
+def is_blacklisted(address: str | bytes) -> bool:
     return get_blacklist().is_blacklisted(address)
@@ -8,16 +8,24 @@ and writes an alert to data/blacklist_alerts.jsonl.
 
 Runs independently — does NOT modify live_trader.py.
 
+Fills are pushed over a WebSocket log subscription, reconnected with backoff when
+it drops; if it cannot be (re-)established, the watchdog falls back to polling
+eth_getLogs, timed to block arrivals.
+
 Usage:
-    .venv/bin/python blacklist_watchdog.py [--dry-run] [--no-sell]
+    .venv/bin/python blacklist_watchdog.py [--dry-run] [--no-sell] [--poll]
 """
 import argparse
+import asyncio
 import json
 import logging
 import logging.handlers
 import os
+import queue
 import sys
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -25,11 +33,17 @@ from pathlib import Path
 parent_dir = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(parent_dir))
 
+try:
+    import orjson
+except ImportError:  # optional — faster alert serialization
+    orjson = None  # type: ignore[assignment]
+
 from blacklist import get_blacklist
 from counterparty_checker import (
-    get_fills_for_address,
+    get_fills_for_address_in_range,
     get_counterparty,
     get_latest_block,
+    subscribe_fills_for_address,
 )
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
@@ -41,9 +55,23 @@ STATE_FILE = os.path.join(DATA_DIR, "watchdog_state.json")
 PROXY_ADDRESS = "0x45bfb3aB984aFDA6c801b4a3cd5126c16926E42E"
 
 # Polling config
-POLL_INTERVAL = 2  # seconds between block checks
+POLL_INTERVAL = 2  # expected seconds between blocks (initial poll schedule)
+MIN_POLL_SLEEP = 0.25  # poll at least this often once a block is overdue
+MAX_POLL_SLEEP = 4.0  # never sleep longer than this (chain stalls)
+BLOCK_GAP_EMA_ALPHA = 0.2  # weight of the newest inter-block gap sample
 MAX_BLOCKS_PER_POLL = 20  # catch up at most N blocks per iteration
+FILL_QUEUE_SIZE = 1024  # producer → main thread backpressure
 SELL_AGGRESSION = 0.95  # sell at 95% of best bid for fast fill
+SELL_WORKERS = 4  # concurrent emergency sells
+MAX_PENDING_SELLS = 32  # sells beyond this many in flight are dropped (alert still written)
+FILL_WAIT_TIMEOUT = 3.0  # max seconds to wait for a sell to fill before cancel/retry
+CLOB_USER_WS = "wss://ws-subscriptions-clob.polymarket.com/ws/user"
+STATE_SAVE_INTERVAL = 1.0  # min seconds between state file rewrites
+HEAD_SYNC_INTERVAL = 30.0  # WS mode: advance last_block to the chain head this often, even without fills
+WS_HEAD_LAG_BLOCKS = 5  # ...minus this margin, in case the HTTP node is ahead of the WS node
+WS_RECONNECT_DELAY = 1.0  # first reconnect delay after the subscription drops, doubled per failure
+WS_MAX_RECONNECT_DELAY = 30.0
+WS_MAX_FAILURES = 5  # consecutive attempts that never go live before falling back to polling
 
 # ─── Logging ──────────────────────────────────────────────────────────────────
 fmt = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
@@ -63,18 +91,159 @@ logger.addHandler(fh)
 
 # ─── CLOB sell client (lazy init) ────────────────────────────────────────────
 _clob_client = None
+_clob_lock = threading.Lock()
 
 
 def _get_clob_client():
     """Lazy-init a PolymarketClient for selling."""
     global _clob_client
-    if _clob_client is None:
+    with _clob_lock:
+        if _clob_client is not None:
+            return _clob_client
         from market import PolymarketClient
         _clob_client = PolymarketClient()
         logger.info("CLOB client initialized for emergency sells")
+        _start_fill_feed(_clob_client)
     return _clob_client
 
 
+# ─── CLOB user channel (fill notifications) ─────────────────────────────────
+class _UserFillFeed:
+    """
+    Tracks size matched per order id from the CLOB user websocket channel, so
+    emergency_sell can react as soon as an order fills instead of sleeping.
+    """
+
+    MAX_TRACKED = 1000
+    MIN_FILL = 0.1  # shares; what emergency_sell counts as filled
+
+    def __init__(self, creds):
+        self._creds = creds
+        self._lock = threading.Lock()
+        self._order_matched: dict[str, float] = {}  # order id -> size_matched from "order" events (cumulative)
+        self._trade_matched: dict[str, float] = {}  # order id -> sum of its sizes across "trade" events
+        self._trades_seen: dict[tuple[str, str], None] = {}  # a trade is re-sent on every status change
+        self._waiters: dict[str, threading.Event] = {}
+        self.connected = False
+        threading.Thread(target=self._run, name="clob-user-ws", daemon=True).start()
+
+    def _run(self):
+        from websockets.sync.client import connect
+
+        while True:
+            try:
+                with connect(CLOB_USER_WS) as ws:
+                    ws.send(json.dumps({
+                        "auth": {
+                            "apiKey": self._creds.api_key,
+                            "secret": self._creds.api_secret,
+                            "passphrase": self._creds.api_passphrase,
+                        },
+                        "type": "user",
+                        "markets": [],
+                    }))
+                    self.connected = True
+                    logger.info("CLOB user channel connected")
+                    for raw in ws:
+                        self._handle(raw)
+            except Exception as e:
+                logger.warning(f"CLOB user channel error: {e}")
+            self.connected = False
+            time.sleep(5)
+
+    def _handle(self, raw):
+        try:
+            msgs = json.loads(raw)
+        except ValueError:
+            return  # PONG / non-JSON keepalive
+        for msg in msgs if isinstance(msgs, list) else [msgs]:
+            event_type = msg.get("event_type")
+            if event_type == "order":
+                self._record_order(msg.get("id"), msg.get("size_matched"))
+            elif event_type == "trade":
+                trade_id = msg.get("id")
+                self._record_trade(trade_id, msg.get("taker_order_id"), msg.get("size"))
+                for maker in msg.get("maker_orders") or []:
+                    self._record_trade(trade_id, maker.get("order_id"), maker.get("matched_amount"))
+
+    def _matched(self, order_id: str) -> float:
+        return max(self._order_matched.get(order_id, 0.0), self._trade_matched.get(order_id, 0.0))
+
+    @staticmethod
+    def _bounded_set(d: dict, key, value):
+        d[key] = value
+        if len(d) > _UserFillFeed.MAX_TRACKED:
+            del d[next(iter(d))]
+
+    def _record_order(self, order_id: str | None, size_matched):
+        if not order_id or size_matched is None:
+            return
+        with self._lock:
+            if float(size_matched) <= self._order_matched.get(order_id, 0.0):
+                return
+            self._bounded_set(self._order_matched, order_id, float(size_matched))
+            self._wake(order_id)
+
+    def _record_trade(self, trade_id: str | None, order_id: str | None, size):
+        if not trade_id or not order_id or size is None:
+            return
+        with self._lock:
+            if (trade_id, order_id) in self._trades_seen:
+                return
+            self._bounded_set(self._trades_seen, (trade_id, order_id), None)
+            self._bounded_set(self._trade_matched, order_id, self._trade_matched.get(order_id, 0.0) + float(size))
+            self._wake(order_id)
+
+    def _wake(self, order_id: str):
+        """Release a waiter only once the order has filled enough to count. Caller holds _lock."""
+        waiter = self._waiters.get(order_id)
+        if waiter and self._matched(order_id) >= self.MIN_FILL:
+            waiter.set()
+
+    def wait_for_fill(self, order_id: str, timeout: float) -> float:
+        """Block until order_id has matched >= MIN_FILL shares or timeout; returns size matched."""
+        event = threading.Event()
+        with self._lock:
+            if self._matched(order_id) >= self.MIN_FILL:
+                return self._matched(order_id)
+            self._waiters[order_id] = event
+        event.wait(timeout)
+        with self._lock:
+            self._waiters.pop(order_id, None)
+            return self._matched(order_id)
+
+
+_fill_feed: _UserFillFeed | None = None
+
+
+def _start_fill_feed(client):
+    global _fill_feed
+    creds = getattr(getattr(client, "clob", None), "creds", None)
+    if creds is None:
+        logger.warning("No CLOB API creds — sells will poll for fills")
+        return
+    try:
+        _fill_feed = _UserFillFeed(creds)
+    except Exception as e:
+        logger.warning(f"CLOB user channel unavailable ({e}) — sells will poll for fills")
+
+
+def _wait_for_fill(client, order_id: str, timeout: float = FILL_WAIT_TIMEOUT) -> float:
+    """
+    Size matched for order_id, waiting at most timeout. Returns as soon as the
+    user channel reports a fill; otherwise (or without the channel) confirms
+    via REST once the timeout has elapsed.
+    """
+    if _fill_feed is not None and _fill_feed.connected:
+        filled = _fill_feed.wait_for_fill(order_id, timeout)
+        if filled >= 0.1:
+            return filled
+    else:
+        time.sleep(timeout)
+    fill = client.get_order_fill(order_id)
+    return float(fill.get("size_matched", 0)) if fill else 0
+
+
 def emergency_sell(token_id: str, shares: float, dry_run: bool = False) -> dict:
     """
     Place an aggressive limit sell to exit a position immediately.
@@ -115,10 +284,7 @@ def emergency_sell(token_id: str, shares: float, dry_run: bool = False) -> dict:
         order_id = client.place_limit_sell(token_id, sell_price2, sell_size)
 
     if order_id:
-        # Wait for fill
-        time.sleep(3)
-        fill = client.get_order_fill(order_id)
-        filled = float(fill.get("size_matched", 0)) if fill else 0
+        filled = _wait_for_fill(client, order_id)
         if filled < 0.1:
             # Cancel and try panic price
             client.cancel_order(order_id)
@@ -126,9 +292,7 @@ def emergency_sell(token_id: str, shares: float, dry_run: bool = False) -> dict:
             logger.info(f"  🚨 PANIC SELL @ {panic_price}")
             order_id2 = client.place_limit_sell(token_id, panic_price, sell_size)
             if order_id2:
-                time.sleep(3)
-                fill2 = client.get_order_fill(order_id2)
-                filled = float(fill2.get("size_matched", 0)) if fill2 else 0
+                filled = _wait_for_fill(client, order_id2)
                 if filled < 0.1:
                     client.cancel_order(order_id2)
 
@@ -143,6 +307,58 @@ def emergency_sell(token_id: str, shares: float, dry_run: bool = False) -> dict:
     return {"success": False, "error": "order_failed"}
 
 
+# ─── Sell pool (lazy init) ───────────────────────────────────────────────────
+# Sells sleep for fills and retry; run them off the detection path so later
+# bad fills (often the same exploiter hitting several positions) sell in parallel.
+_sell_pool: ThreadPoolExecutor | None = None
+_sell_slots = threading.BoundedSemaphore(MAX_PENDING_SELLS)
+
+
+def _submit_sell(fill: dict, counterparty: str, token_id: str, shares: float, dry_run: bool):
+    """Run emergency_sell on the pool; the alert is written once the sell finishes."""
+    global _sell_pool
+    if _sell_pool is None:
+        _sell_pool = ThreadPoolExecutor(max_workers=SELL_WORKERS, thread_name_prefix="sell")
+    # Never block: on the WS path this runs on the event loop
+    if not _sell_slots.acquire(blocking=False):
+        logger.error(f"  {MAX_PENDING_SELLS} sells already in flight — dropping this sell")
+        write_alert(fill, counterparty, {"success": False, "error": "sell_queue_full"})
+        return
+
+    def _done(fut: Future):
+        _sell_slots.release()
+        try:
+            sell_result = fut.result()
+        except Exception as e:
+            logger.error(f"  Emergency sell failed: {e}", exc_info=True)
+            sell_result = {"success": False, "error": str(e)}
+        logger.info(f"  Sell result: {sell_result}")
+        write_alert(fill, counterparty, sell_result)
+
+    _sell_pool.submit(emergency_sell, token_id, shares, dry_run=dry_run).add_done_callback(_done)
+
+
+_alerts_fh = None
+_alerts_lock = threading.Lock()
+
+
+def _get_alerts_fh():
+    """Long-lived unbuffered binary handle: one write() per alert, no open/close."""
+    global _alerts_fh
+    if _alerts_fh is None:
+        _alerts_fh = open(ALERTS_FILE, "ab", buffering=0)
+    return _alerts_fh
+
+
+def _alert_line(alert: dict) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(alert, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass  # e.g. an amount beyond 64 bits
+    return (json.dumps(alert) + "\n").encode()
+
+
 def write_alert(fill: dict, counterparty: str, sell_result: dict | None = None):
     """Append alert to blacklist_alerts.jsonl."""
     alert = {
@@ -158,8 +374,9 @@ def write_alert(fill: dict, counterparty: str, sell_result: dict | None = None):
         "taker_amount": fill.get("taker_amount", 0),
         "sell_result": sell_result,
     }
-    with open(ALERTS_FILE, "a") as f:
-        f.write(json.dumps(alert) + "\n")
+    line = _alert_line(alert)
+    with _alerts_lock:  # sell callbacks write from pool threads
+        _get_alerts_fh().write(line)
     logger.info(f"  Alert written to {ALERTS_FILE}")
 
 
@@ -173,13 +390,230 @@ def load_state() -> dict:
     return {}
 
 
-def save_state(state: dict):
-    with open(STATE_FILE, "w") as f:
+_last_save = 0.0
+
+
+def save_state(state: dict, force: bool = False):
+    """Persist state at most once per STATE_SAVE_INTERVAL unless forced; atomic via rename."""
+    global _last_save
+    now = time.monotonic()
+    if not force and now - _last_save < STATE_SAVE_INTERVAL:
+        return
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w") as f:
         json.dump(state, f)
+    os.replace(tmp, STATE_FILE)
+    _last_save = now
 
 
-def run(dry_run: bool = False, no_sell: bool = False):
+def process_fill(fill: dict, bl, stats: dict, dry_run: bool, no_sell: bool, seen: dict | None = None):
+    """
+    Check one of our fills against the blacklist and exit the position if bad.
+    seen memoizes verdicts per counterparty for the current batch; callers reset
+    it every batch so a blacklist refresh is picked up on the next one.
+    """
+    stats["fills_checked"] += 1
+    fills_checked = stats["fills_checked"]
+    block_num = fill["block"]
+    counterparty = get_counterparty(fill, PROXY_ADDRESS)
+    if not counterparty:
+        return
+
+    is_bad = seen.get(counterparty) if seen is not None else None
+    if is_bad is None:
+        # get_counterparty returns canonical lowercase 0x-hex, so skip normalization
+        is_bad = bl.contains_normalized(bytes.fromhex(counterparty[2:]))
+        if seen is not None:
+            seen[counterparty] = is_bad
+
+    # Hot path: %-style args so nothing is formatted (or sliced) unless emitted
+    if fills_checked % 50 == 1 or is_bad:
+        logger.info(
+            "Fill #%d block=%d counterparty=%.12s... blacklisted=%s",
+            fills_checked, block_num, counterparty, is_bad,
+        )
+
+    if is_bad:
+        stats["alerts"] += 1
+        logger.warning(
+            "  🚨 BLACKLISTED COUNTERPARTY DETECTED! %s in tx %s",
+            counterparty, fill.get("tx_hash", "?"),
+        )
+
+        # Determine which token we received (to sell it)
+        our = PROXY_ADDRESS.lower()
+        if fill["taker"] == our:
+            # We're the taker — we received maker's asset
+            token_to_sell = fill.get("maker_asset_id", "")
+            shares = fill.get("maker_amount", 0) / 1_000_000  # CTF uses 6 decimals
+        else:
+            # We're the maker — we received taker's asset
+            token_to_sell = fill.get("taker_asset_id", "")
+            shares = fill.get("taker_amount", 0) / 1_000_000
+
+        if not no_sell and token_to_sell and shares > 0:
+            # Convert hex token_id to decimal string for CLOB
+            token_id_dec = str(int(token_to_sell, 16))
+            logger.info(
+                f"  Token to sell: {token_id_dec[:20]}... | "
+                f"shares: {shares:.2f}"
+            )
+            _submit_sell(fill, counterparty, token_id_dec, shares, dry_run)
+        else:
+            write_alert(fill, counterparty)
+
+
+async def _ws_loop(bl, stats: dict, dry_run: bool, no_sell: bool):
+    """
+    Handle fills pushed over the WebSocket subscription, reconnecting with backoff
+    when it drops. Raises once WS_MAX_FAILURES attempts in a row never go live.
+    """
+    caught_up_to = stats["last_block"]
+    head_task: asyncio.Task | None = None
+    live = False
+
+    async def track_head():
+        # Fills are sparse; without this last_block would only move on a fill, and a
+        # restart or fallback to polling would re-scan the whole idle stretch
+        while True:
+            await asyncio.sleep(HEAD_SYNC_INTERVAL)
+            try:
+                head = await asyncio.to_thread(get_latest_block)
+            except Exception as e:
+                logger.warning(f"Head sync failed: {e}")
+                continue
+            if head - WS_HEAD_LAG_BLOCKS > stats["last_block"]:
+                stats["last_block"] = head - WS_HEAD_LAG_BLOCKS
+                save_state(stats, force=True)
+
+    def catch_up():
+        # Cover blocks between the saved state and the subscription going live,
+        # MAX_BLOCKS_PER_POLL at a time so public RPCs accept the range.
+        # Blocking RPC: runs in a worker thread so the WebSocket keeps being serviced.
+        nonlocal caught_up_to
+        caught_up_to = get_latest_block()
+        if caught_up_to - stats["last_block"] > MAX_BLOCKS_PER_POLL:
+            logger.info(f"Catching up {caught_up_to - stats['last_block']} blocks")
+        seen: dict[str, bool] = {}
+        while stats["last_block"] < caught_up_to:
+            to_block = min(caught_up_to, stats["last_block"] + MAX_BLOCKS_PER_POLL)
+            for fill in get_fills_for_address_in_range(stats["last_block"] + 1, to_block, PROXY_ADDRESS):
+                process_fill(fill, bl, stats, dry_run, no_sell, seen)
+            stats["last_block"] = to_block
+            save_state(stats)
+            seen.clear()
+        save_state(stats, force=True)
+
+    async def on_ready():
+        nonlocal head_task, live
+        await asyncio.to_thread(catch_up)
+        logger.info(f"WebSocket subscription live from block {caught_up_to}")
+        live = True
+        # Only once caught up: from here on the subscription covers every new block
+        head_task = asyncio.get_running_loop().create_task(track_head())
+
+    failures = 0
+    while True:
+        live = False
+        try:
+            async for fill in subscribe_fills_for_address(PROXY_ADDRESS, on_ready=on_ready):
+                if fill["block"] <= caught_up_to:
+                    continue  # already handled by the catch-up
+                try:
+                    process_fill(fill, bl, stats, dry_run, no_sell)
+                    stats["last_block"] = max(stats["last_block"], fill["block"])
+                    save_state(stats, force=True)  # pushed fills are sparse, don't leave them unsaved
+                except Exception as e:
+                    logger.error(f"Error processing fill: {e}", exc_info=True)
+            error: Exception = ConnectionError("subscription closed")
+        except ImportError:
+            raise  # no WebSocket support at all — poll instead
+        except Exception as e:
+            error = e
+        finally:
+            if head_task is not None:
+                head_task.cancel()
+                head_task = None
+
+        failures = 0 if live else failures + 1
+        if failures >= WS_MAX_FAILURES:
+            raise ConnectionError(f"{failures} WebSocket attempts failed, last: {error}")
+        delay = min(WS_MAX_RECONNECT_DELAY, WS_RECONNECT_DELAY * 2 ** failures)
+        logger.warning(f"WebSocket subscription dropped ({error}) — reconnecting in {delay:.0f}s")
+        await asyncio.sleep(delay)
+
+
+def _poll_producer(q: queue.Queue, last_block: int):
+    """
+    Fetch our fills in block batches and hand them to the main thread, so RPC
+    ingestion keeps going while the main thread is busy in an emergency sell.
+    Puts ("fill", fill) for each fill, then ("block", n) once n is fully fetched.
+
+    Polls are scheduled just after the next block is expected, using an EMA of
+    observed inter-block gaps, instead of a fixed POLL_INTERVAL.
+    """
+    ema_gap = float(POLL_INTERVAL)
+    seen_block = last_block
+    seen_at = time.monotonic()
+
+    while True:
+        try:
+            current_block = get_latest_block()
+            now = time.monotonic()
+            if current_block > seen_block:
+                gap = (now - seen_at) / (current_block - seen_block)
+                ema_gap += BLOCK_GAP_EMA_ALPHA * (gap - ema_gap)
+                seen_block, seen_at = current_block, now
+
+            if current_block > last_block:
+                # Process blocks in batches
+                from_block = last_block + 1
+                to_block = min(current_block, from_block + MAX_BLOCKS_PER_POLL - 1)
+
+                for fill in get_fills_for_address_in_range(from_block, to_block, PROXY_ADDRESS):
+                    q.put(("fill", fill))
+                q.put(("block", to_block))
+                last_block = to_block
+
+                if last_block < current_block:
+                    continue  # still catching up, don't sleep
+
+            next_expected = ema_gap - (time.monotonic() - seen_at)
+            time.sleep(min(MAX_POLL_SLEEP, max(MIN_POLL_SLEEP, next_expected)))
+
+        except Exception as e:
+            logger.error(f"Error in poll producer: {e}", exc_info=True)
+            time.sleep(10)
+
+
+def _poll_loop(bl, stats: dict, dry_run: bool, no_sell: bool):
+    q: queue.Queue = queue.Queue(maxsize=FILL_QUEUE_SIZE)
+    threading.Thread(
+        target=_poll_producer, args=(q, stats["last_block"]), name="poll-producer", daemon=True
+    ).start()
+
+    seen: dict[str, bool] = {}  # per-batch blacklist verdicts
+    while True:
+        kind, item = q.get()
+        if kind == "fill":
+            try:
+                process_fill(item, bl, stats, dry_run, no_sell, seen)
+            except Exception as e:
+                logger.error(f"Error processing fill: {e}", exc_info=True)
+        else:
+            stats["last_block"] = item
+            seen.clear()
+            try:
+                save_state(stats)
+            except Exception as e:
+                # Keep consuming: the producer would block on a full queue, and the
+                # next marker retries the save
+                logger.error(f"Error saving state: {e}", exc_info=True)
+
+
+def run(dry_run: bool = False, no_sell: bool = False, use_ws: bool = True):
     bl = get_blacklist()
+    bl.start_watcher()
     logger.info(
         f"Blacklist watchdog started | proxy={PROXY_ADDRESS} | "
         f"blacklist={bl.count} addresses | dry_run={dry_run} | no_sell={no_sell}"
@@ -197,92 +631,27 @@ def run(dry_run: bool = False, no_sell: bool = False):
             logger.error(f"Cannot get latest block: {e}")
             return
 
-    fills_checked = 0
-    alerts_triggered = 0
+    stats = {"last_block": last_block, "fills_checked": 0, "alerts": 0}
 
-    while True:
-        try:
-            current_block = get_latest_block()
-
-            if current_block <= last_block:
-                time.sleep(POLL_INTERVAL)
-                continue
-
-            # Process blocks in batches
-            from_block = last_block + 1
-            to_block = min(current_block, from_block + MAX_BLOCKS_PER_POLL - 1)
-
-            for block_num in range(from_block, to_block + 1):
-                fills = get_fills_for_address(block_num, PROXY_ADDRESS)
-
-                for fill in fills:
-                    fills_checked += 1
-                    counterparty = get_counterparty(fill, PROXY_ADDRESS)
-                    if not counterparty:
-                        continue
-
-                    is_bad = bl.is_blacklisted(counterparty)
-
-                    if fills_checked % 50 == 1 or is_bad:
-                        logger.info(
-                            f"Fill #{fills_checked} block={block_num} "
-                            f"counterparty={counterparty[:12]}... "
-                            f"blacklisted={is_bad}"
-                        )
-
-                    if is_bad:
-                        alerts_triggered += 1
-                        logger.warning(
-                            f"  🚨 BLACKLISTED COUNTERPARTY DETECTED! "
-                            f"{counterparty} in tx {fill.get('tx_hash', '?')}"
-                        )
-
-                        # Determine which token we received (to sell it)
-                        our = PROXY_ADDRESS.lower()
-                        if fill["taker"].lower() == our:
-                            # We're the taker — we received maker's asset
-                            token_to_sell = fill.get("maker_asset_id", "")
-                            shares = fill.get("maker_amount", 0) / 1_000_000  # CTF uses 6 decimals
-                        else:
-                            # We're the maker — we received taker's asset
-                            token_to_sell = fill.get("taker_asset_id", "")
-                            shares = fill.get("taker_amount", 0) / 1_000_000
-
-                        sell_result = None
-                        if not no_sell and token_to_sell and shares > 0:
-                            # Convert hex token_id to decimal string for CLOB
-                            token_id_dec = str(int(token_to_sell, 16))
-                            logger.info(
-                                f"  Token to sell: {token_id_dec[:20]}... | "
-                                f"shares: {shares:.2f}"
-                            )
-                            sell_result = emergency_sell(
-                                token_id_dec, shares, dry_run=dry_run
-                            )
-                            logger.info(f"  Sell result: {sell_result}")
-
-                        write_alert(fill, counterparty, sell_result)
-
-            last_block = to_block
-            save_state({"last_block": last_block, "fills_checked": fills_checked, "alerts": alerts_triggered})
-
-            time.sleep(POLL_INTERVAL)
-
-        except KeyboardInterrupt:
-            logger.info("Shutting down...")
-            save_state({"last_block": last_block, "fills_checked": fills_checked, "alerts": alerts_triggered})
-            break
-        except Exception as e:
-            logger.error(f"Error in main loop: {e}", exc_info=True)
-            time.sleep(10)
+    try:
+        if use_ws:
+            try:
+                asyncio.run(_ws_loop(bl, stats, dry_run, no_sell))
+            except Exception as e:
+                logger.warning(f"WebSocket feed unavailable ({e}) — falling back to polling")
+        _poll_loop(bl, stats, dry_run, no_sell)
+    except KeyboardInterrupt:
+        logger.info("Shutting down...")
+        save_state(stats, force=True)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Blacklist watchdog for BTC 5-min bot")
     parser.add_argument("--dry-run", action="store_true", help="Log sells but don't execute")
     parser.add_argument("--no-sell", action="store_true", help="Only alert, don't sell")
+    parser.add_argument("--poll", action="store_true", help="Poll eth_getLogs instead of a WebSocket subscription")
     args = parser.parse_args()
-    run(dry_run=args.dry_run, no_sell=args.no_sell)
+    run(dry_run=args.dry_run, no_sell=args.no_sell, use_ws=not args.poll)
 
 
 if __name__ == "__main__":
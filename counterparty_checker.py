@@ -10,13 +10,29 @@ OrderFilled event on CTF Exchange (0x4bFb41d5B3570DeFd03C39a9A4D8dE6Bd8B8982E):
           takerAmountFilled(uint256) | fee(uint256)
 """
 import logging
+from functools import lru_cache
+from typing import AsyncIterator, Awaitable, Callable, cast
+
 from web3 import Web3
+from web3.types import FilterParams
+
+try:
+    import numpy as np
+except ImportError:  # optional — bulk parsing falls back to per-log decoding
+    np = None  # type: ignore[assignment]
 
 logger = logging.getLogger(__name__)
 
 POLYGON_RPC = "https://polygon-bor-rpc.publicnode.com"
+POLYGON_WSS = "wss://polygon-bor-rpc.publicnode.com"
 CTF_EXCHANGE = "0x4bFb41d5B3570DeFd03C39a9A4D8dE6Bd8B8982E"
 ORDER_FILLED_TOPIC = "0xd0a08e8c493f9c94f29311604c9de1b4e8c8d4c06bd0c789af57f2d65bfec0f6"
+CTF_EXCHANGE_CS = Web3.to_checksum_address(CTF_EXCHANGE)
+
+# Precomputed log filter; per-call params only add the block range (and address topics)
+_BASE_FILTER = {"address": CTF_EXCHANGE_CS, "topics": [ORDER_FILLED_TOPIC]}
+
+BULK_PARSE_MIN_LOGS = 64  # below this, per-log decoding beats NumPy setup cost
 
 _w3: Web3 | None = None
 
@@ -28,83 +44,233 @@ def _get_w3() -> Web3:
     return _w3
 
 
+def _log_data(log: dict) -> bytes:
+    data = log["data"]
+    if isinstance(data, str):
+        data = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    return data
+
+
 def parse_order_filled_log(log: dict) -> dict | None:
     """
     Parse a single OrderFilled log entry.
-    Returns dict with maker, taker, maker_asset_id, taker_asset_id, maker_amount, taker_amount, fee.
+    Returns dict with maker, taker, maker_asset_id, taker_asset_id, maker_amount, taker_amount.
+    maker/taker are lowercase 0x-hex (no checksum casing — every consumer lowercases anyway).
+    The fee word is not decoded — nothing downstream reads it.
     """
     topics = log.get("topics", [])
     if len(topics) < 4:
         return None
 
-    maker = Web3.to_checksum_address("0x" + topics[2].hex()[-40:])
-    taker = Web3.to_checksum_address("0x" + topics[3].hex()[-40:])
-
-    data = log["data"]
-    if isinstance(data, str):
-        data = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    maker = "0x" + topics[2].hex()[-40:]
+    taker = "0x" + topics[3].hex()[-40:]
 
+    data = _log_data(log)
     if len(data) < 160:
         return {"maker": maker, "taker": taker}
 
-    maker_asset_id = hex(int.from_bytes(data[0:32], "big"))
-    taker_asset_id = hex(int.from_bytes(data[32:64], "big"))
-    maker_amount = int.from_bytes(data[64:96], "big")
-    taker_amount = int.from_bytes(data[96:128], "big")
-    fee = int.from_bytes(data[128:160], "big")
-
+    # Slice without copying; asset ids go straight to hex (same format as hex(int)),
+    # only the amounts are needed as ints
+    mv = memoryview(data)
     return {
         "maker": maker,
         "taker": taker,
-        "maker_asset_id": maker_asset_id,
-        "taker_asset_id": taker_asset_id,
-        "maker_amount": maker_amount,
-        "taker_amount": taker_amount,
-        "fee": fee,
+        "maker_asset_id": "0x" + (mv[0:32].hex().lstrip("0") or "0"),
+        "taker_asset_id": "0x" + (mv[32:64].hex().lstrip("0") or "0"),
+        "maker_amount": int.from_bytes(mv[64:96], "big"),
+        "taker_amount": int.from_bytes(mv[96:128], "big"),
     }
 
 
-def get_fills_in_block(block_number: int) -> list[dict]:
-    """Get all OrderFilled events in a block from the CTF Exchange."""
+def parse_order_filled_logs_bulk(logs: list) -> list[dict | None]:
+    """
+    Parse a batch of OrderFilled logs; same output as parse_order_filled_log per log.
+    With NumPy and at least BULK_PARSE_MIN_LOGS logs, the amount words are decoded
+    in one vectorized pass: amounts fit in 64 bits in practice, so the low 8 bytes
+    of each 32-byte word are read as big-endian uint64. Logs whose high bytes are
+    non-zero fall back to int.from_bytes. Asset ids stay per-log hex slices.
+    """
+    if np is None or len(logs) < BULK_PARSE_MIN_LOGS:
+        return [parse_order_filled_log(log) for log in logs]
+
+    results: list[dict | None] = []
+    full: list[tuple[dict, bytes]] = []  # (parsed fill, data) for complete logs
+    for log in logs:
+        topics = log.get("topics", [])
+        if len(topics) < 4:
+            results.append(None)
+            continue
+        fill = {"maker": "0x" + topics[2].hex()[-40:], "taker": "0x" + topics[3].hex()[-40:]}
+        data = _log_data(log)
+        if len(data) >= 160:
+            full.append((fill, data))
+        results.append(fill)
+
+    if not full:
+        return results
+
+    arr = np.frombuffer(b"".join(data[:128] for _, data in full), dtype=np.uint8).reshape(-1, 128)
+    overflow = np.logical_or(arr[:, 64:88].any(axis=1), arr[:, 96:120].any(axis=1)).tolist()
+    maker_amounts = np.ascontiguousarray(arr[:, 88:96]).view(">u8")[:, 0].tolist()
+    taker_amounts = np.ascontiguousarray(arr[:, 120:128]).view(">u8")[:, 0].tolist()
+
+    for row, (fill, data) in enumerate(full):
+        mv = memoryview(data)
+        fill["maker_asset_id"] = "0x" + (mv[0:32].hex().lstrip("0") or "0")
+        fill["taker_asset_id"] = "0x" + (mv[32:64].hex().lstrip("0") or "0")
+        if overflow[row]:
+            fill["maker_amount"] = int.from_bytes(mv[64:96], "big")
+            fill["taker_amount"] = int.from_bytes(mv[96:128], "big")
+        else:
+            fill["maker_amount"] = maker_amounts[row]
+            fill["taker_amount"] = taker_amounts[row]
+    return results
+
+
+@lru_cache(maxsize=16)
+def _address_topics(address: str) -> tuple[list, list]:
+    """
+    Topic filters matching address as maker (topic2) and as taker (topic3).
+    Addresses are left-padded to 32 bytes, as stored for indexed address params.
+    """
+    padded = "0x" + "0" * 24 + address.lower().removeprefix("0x")
+    return [ORDER_FILLED_TOPIC, None, padded], [ORDER_FILLED_TOPIC, None, None, padded]
+
+
+def _get_fills(
+    from_block: int,
+    to_block: int,
+    topics: list | None = None,
+    involving: bytes | None = None,
+) -> list[dict]:
+    """
+    Fetch and parse OrderFilled logs. If involving (a 32-byte padded address) is
+    given, logs where it is neither maker nor taker are skipped before decoding.
+    """
     w3 = _get_w3()
-    try:
-        logs = w3.eth.get_logs({
-            "fromBlock": block_number,
-            "toBlock": block_number,
-            "address": Web3.to_checksum_address(CTF_EXCHANGE),
-            "topics": [ORDER_FILLED_TOPIC],
-        })
-    except Exception as e:
-        logger.warning(f"get_logs failed for block {block_number}: {e}")
-        return []
+    params = {**_BASE_FILTER, "fromBlock": from_block, "toBlock": to_block}
+    if topics is not None:
+        params["topics"] = topics
+    logs = w3.eth.get_logs(cast(FilterParams, params))
+
+    if involving is not None:
+        logs = [
+            log for log in logs
+            if len(log["topics"]) >= 4 and involving in (log["topics"][2], log["topics"][3])
+        ]
 
     results = []
-    for log in logs:
-        parsed = parse_order_filled_log(log)
+    for log, parsed in zip(logs, parse_order_filled_logs_bulk(logs)):
         if parsed:
             parsed["tx_hash"] = log["transactionHash"].hex()
-            parsed["block"] = block_number
+            parsed["block"] = log["blockNumber"]
             parsed["log_index"] = log.get("logIndex", 0)
             results.append(parsed)
     return results
 
 
+def get_fills_in_range(from_block: int, to_block: int) -> list[dict]:
+    """
+    Get all OrderFilled events from the CTF Exchange in [from_block, to_block]
+    with a single eth_getLogs call. Results are in chain order.
+    Raises on RPC failure so callers can retry the range.
+    """
+    return _get_fills(from_block, to_block)
+
+
+def get_fills_in_block(block_number: int) -> list[dict]:
+    """Get all OrderFilled events in a block from the CTF Exchange."""
+    try:
+        return get_fills_in_range(block_number, block_number)
+    except Exception as e:
+        logger.warning(f"get_logs failed for block {block_number}: {e}")
+        return []
+
+
+def get_fills_for_address_in_range(
+    from_block: int, to_block: int, address: str, server_filter: bool = True
+) -> list[dict]:
+    """
+    Get OrderFilled events in [from_block, to_block] where address is maker or taker.
+    By default filtering happens on the RPC node via the indexed maker (topic2) /
+    taker (topic3) slots, so only our own fills are downloaded (two calls).
+    With server_filter=False, all fills are fetched in one call and non-matching
+    logs are dropped on their topics before any decoding. Raises on RPC failure.
+    """
+    if not server_filter:
+        padded = bytes(12) + bytes.fromhex(address.lower().removeprefix("0x"))
+        return _get_fills(from_block, to_block, involving=padded)
+
+    maker_topics, taker_topics = _address_topics(address)
+    as_maker = _get_fills(from_block, to_block, maker_topics)
+    as_taker = _get_fills(from_block, to_block, taker_topics)
+
+    # A self-match shows up in both queries
+    seen = {(f["tx_hash"], f["log_index"]) for f in as_maker}
+    fills = as_maker + [f for f in as_taker if (f["tx_hash"], f["log_index"]) not in seen]
+    fills.sort(key=lambda f: (f["block"], f["log_index"]))
+    return fills
+
+
 def get_fills_for_address(block_number: int, address: str) -> list[dict]:
     """Get OrderFilled events involving a specific address (as maker or taker)."""
-    addr = address.lower()
-    all_fills = get_fills_in_block(block_number)
-    return [f for f in all_fills if f["maker"].lower() == addr or f["taker"].lower() == addr]
+    try:
+        return get_fills_for_address_in_range(block_number, block_number, address)
+    except Exception as e:
+        logger.warning(f"get_logs failed for block {block_number}: {e}")
+        return []
 
 
 def get_counterparty(fill: dict, our_address: str) -> str | None:
-    """Given a parsed fill dict and our address, return the counterparty."""
+    """Given a parsed fill dict and our address, return the counterparty (lowercase)."""
     our = our_address.lower()
-    if fill["maker"].lower() == our:
+    if fill["maker"] == our:
         return fill["taker"]
-    elif fill["taker"].lower() == our:
+    elif fill["taker"] == our:
         return fill["maker"]
     return None
 
 
+async def subscribe_fills_for_address(
+    address: str,
+    ws_url: str = POLYGON_WSS,
+    on_ready: Callable[[], Awaitable[None]] | None = None,
+) -> AsyncIterator[dict]:
+    """
+    Stream OrderFilled events where address is maker or taker, pushed by the node
+    over eth_subscribe("logs") — no polling. Requires web3 >= 7 (AsyncWeb3 +
+    WebSocketProvider). on_ready is awaited once both subscriptions are live, e.g.
+    to backfill missed blocks over HTTP. Raises when the connection drops; callers
+    should fall back to get_fills_for_address_in_range() to cover the gap.
+    """
+    from web3 import AsyncWeb3, WebSocketProvider
+
+    maker_topics, taker_topics = _address_topics(address)
+    async with AsyncWeb3(WebSocketProvider(ws_url)) as w3:
+        await w3.eth.subscribe("logs", {**_BASE_FILTER, "topics": maker_topics})
+        await w3.eth.subscribe("logs", {**_BASE_FILTER, "topics": taker_topics})
+        if on_ready:
+            await on_ready()
+        seen: set[tuple[str, int]] = set()
+        async for payload in w3.socket.process_subscriptions():
+            log = payload["result"]
+            if log.get("removed"):
+                continue  # dropped by a reorg
+            parsed = parse_order_filled_log(log)
+            if not parsed:
+                continue
+            parsed["tx_hash"] = log["transactionHash"].hex()
+            parsed["block"] = log["blockNumber"]
+            parsed["log_index"] = log.get("logIndex", 0)
+            # A self-match arrives on both subscriptions
+            key = (parsed["tx_hash"], parsed["log_index"])
+            if key in seen:
+                continue
+            seen.add(key)
+            if len(seen) > 10_000:
+                seen.clear()
+            yield parsed
+
+
 def get_latest_block() -> int:
     return _get_w3().eth.block_number
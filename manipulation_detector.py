@@ -3,7 +3,8 @@
 Real-time Polymarket BTC 5-min market manipulation detector.
 
 Detects order-book manipulation (mass cancellations, liquidity pulls, price spoofing)
-by comparing orderbook state changes against actual BTC price movements.
+by comparing orderbook state changes against actual BTC price movements. Books are
+streamed from the CLOB market WebSocket and analyzed on every update.
 
 Usage:
     python manipulation_detector.py              # monitor only
@@ -17,11 +18,25 @@ import json
 import logging
 import logging.handlers
 import os
+import queue
 import signal
 import time
 from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from typing import Callable
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # optional — JIT-compiles the analyze() kernel
+    numba = None  # type: ignore[assignment]
+
+try:
+    import orjson
+except ImportError:  # optional — faster alert serialization and WS message parsing
+    orjson = None  # type: ignore[assignment]
 
 from config import BINANCE_WS
 from market import PolymarketClient, Window, current_window_timestamp, next_window_timestamp
@@ -30,9 +45,15 @@ from price_feed import BinanceFeed
 # ---------------------------------------------------------------------------
 # Config
 # ---------------------------------------------------------------------------
-POLL_INTERVAL = 2.0          # orderbook poll frequency (seconds)
+POLL_INTERVAL = 2.0          # history sample period / REST fallback poll frequency (seconds)
 ALERT_COOLDOWN = 15.0        # min seconds between alerts of same type
+ALERT_COOLDOWN_NS = int(ALERT_COOLDOWN * 1e9)
 HISTORY_SIZE = 60             # keep last N orderbook snapshots (~2 min at 2s)
+ALERT_HISTORY_SIZE = 1024     # keep last N alerts in memory (all of them go to ALERT_LOG)
+
+# Orderbook feed
+CLOB_MARKET_WS = "wss://ws-subscriptions-clob.polymarket.com/ws/market"
+WS_TS_DELTA_THRESHOLD_MS = 5_000  # resync if an update arrives this far behind its exchange timestamp
 
 # Thresholds
 PRICE_JUMP_THRESHOLD = 0.10       # mid-price move > 10c without BTC move
@@ -41,14 +62,30 @@ DEPTH_DROP_PCT = 0.40             # 40% depth disappears in one tick
 DEPTH_DROP_WINDOW = 3             # compare depth over last N snapshots
 DIVERGENCE_THRESHOLD = 0.15       # orderbook mid vs implied fair value divergence
 VOLUME_VANISH_THRESHOLD = 50.0    # >$50 of volume vanishes in one tick
+SPREAD_EXPANSION_THRESHOLD = 3.0  # spread widens 3x in one tick...
+SPREAD_MIN_WIDTH = 0.10           # ...and is at least 10c wide
+
+# Severity ladders: (min value, severity), highest rung first; the last rung is the alert threshold
+PRICE_JUMP_SEVERITY = ((0.20, "CRITICAL"), (0.15, "HIGH"), (PRICE_JUMP_THRESHOLD, "MEDIUM"))
+DEPTH_DROP_SEVERITY = ((0.70, "CRITICAL"), (0.55, "HIGH"), (DEPTH_DROP_PCT, "MEDIUM"))
+VOLUME_VANISH_SEVERITY = ((100.0, "HIGH"), (VOLUME_VANISH_THRESHOLD, "MEDIUM"))
+SPREAD_SEVERITY = ((5.0, "HIGH"), (SPREAD_EXPANSION_THRESHOLD, "MEDIUM"))
+
+ALERT_TYPES = (
+    "PRICE_JUMP_UP", "PRICE_JUMP_DOWN", "SPREAD_BLOWOUT_UP", "SPREAD_BLOWOUT_DOWN", "DEPTH_DROP",
+    "VOLUME_VANISH_UP_BIDS", "VOLUME_VANISH_UP_ASKS", "VOLUME_VANISH_DOWN_BIDS", "VOLUME_VANISH_DOWN_ASKS",
+    "DIVERGENCE_UP_CHEAP", "DIVERGENCE_DOWN_CHEAP",
+)
 
 # Counter-trade
 COUNTER_TRADE_SIZE = 5.0          # USDC per counter-trade
 COUNTER_TRADE_EDGE = 0.08         # only trade if manipulation moved price > 8c from fair
+COUNTER_TRADE_COOLDOWN_NS = ALERT_COOLDOWN_NS  # per token bought: analyze() runs on every book update, history only every POLL_INTERVAL
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 os.makedirs(DATA_DIR, exist_ok=True)
 ALERT_LOG = os.path.join(DATA_DIR, "manipulation_alerts.jsonl")
+ALERT_LOG_BUFFER = 1 << 16        # alert JSONL write buffer; flushed once per tick with new alerts
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -58,12 +95,15 @@ root = logging.getLogger()
 root.setLevel(logging.INFO)
 sh = logging.StreamHandler()
 sh.setFormatter(fmt)
-root.addHandler(sh)
 fh = logging.handlers.RotatingFileHandler(
     os.path.join(DATA_DIR, "manipulation_detector.log"), maxBytes=5_000_000, backupCount=3
 )
 fh.setFormatter(fmt)
-root.addHandler(fh)
+# Console and file writes happen on the listener thread, not the event loop
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+root.addHandler(logging.handlers.QueueHandler(log_queue))
+log_listener = logging.handlers.QueueListener(log_queue, sh, fh, respect_handler_level=True)
+log_listener.start()
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
 logging.getLogger("websockets").setLevel(logging.WARNING)
@@ -73,7 +113,7 @@ logger = logging.getLogger("manip")
 # ---------------------------------------------------------------------------
 # Data structures
 # ---------------------------------------------------------------------------
-@dataclass
+@dataclass(slots=True, frozen=True)
 class BookSnapshot:
     ts: float
     bid_up: float
@@ -85,25 +125,133 @@ class BookSnapshot:
     depth_down_bids: float
     depth_down_asks: float
     btc_price: float
-
-    @property
-    def mid_up(self) -> float:
-        if self.bid_up and self.ask_up:
-            return (self.bid_up + self.ask_up) / 2
-        return self.bid_up or self.ask_up or 0
-
-    @property
-    def mid_down(self) -> float:
-        if self.bid_down and self.ask_down:
-            return (self.bid_down + self.ask_down) / 2
-        return self.bid_down or self.ask_down or 0
-
-    @property
-    def total_depth(self) -> float:
-        return self.depth_up_bids + self.depth_up_asks + self.depth_down_bids + self.depth_down_asks
-
-
-@dataclass
+    # Derived once at construction; analyze() reads these many times per tick
+    mid_up: float = field(init=False, default=0.0)
+    mid_down: float = field(init=False, default=0.0)
+    spread_up: float = field(init=False, default=0.0)     # 0 unless both sides quoted
+    spread_down: float = field(init=False, default=0.0)
+    total_depth: float = field(init=False, default=0.0)
+
+    def __post_init__(self):
+        bid_up, ask_up, bid_down, ask_down = self.bid_up, self.ask_up, self.bid_down, self.ask_down
+        set_ = object.__setattr__
+        if bid_up and ask_up:
+            set_(self, "mid_up", (bid_up + ask_up) / 2)
+            set_(self, "spread_up", ask_up - bid_up)
+        else:
+            set_(self, "mid_up", bid_up or ask_up or 0)
+        if bid_down and ask_down:
+            set_(self, "mid_down", (bid_down + ask_down) / 2)
+            set_(self, "spread_down", ask_down - bid_down)
+        else:
+            set_(self, "mid_down", bid_down or ask_down or 0)
+        set_(self, "total_depth",
+             self.depth_up_bids + self.depth_up_asks + self.depth_down_bids + self.depth_down_asks)
+
+
+# SnapshotRing columns (BookSnapshot field order, plus precomputed total depth)
+(TS, BID_UP, ASK_UP, BID_DOWN, ASK_DOWN,
+ DEPTH_UP_BIDS, DEPTH_UP_ASKS, DEPTH_DOWN_BIDS, DEPTH_DOWN_ASKS, BTC, TOTAL_DEPTH) = range(11)
+N_FIELDS = 11
+DEPTH_COLS = slice(DEPTH_UP_BIDS, DEPTH_DOWN_ASKS + 1)
+DEPTH_LABELS = ("UP_BIDS", "UP_ASKS", "DOWN_BIDS", "DOWN_ASKS")
+
+
+def _row_values(snap: BookSnapshot) -> tuple:
+    return (
+        snap.ts, snap.bid_up, snap.ask_up, snap.bid_down, snap.ask_down,
+        snap.depth_up_bids, snap.depth_up_asks, snap.depth_down_bids, snap.depth_down_asks,
+        snap.btc_price, snap.total_depth,
+    )
+
+
+class SnapshotRing:
+    """
+    Fixed-size ring buffer of snapshots stored struct-of-arrays style: one float64
+    row per snapshot in a preallocated (size, N_FIELDS) array, so appends allocate
+    nothing and checks read columns directly. Indexing is deque-like (-1 = newest).
+    """
+
+    def __init__(self, size: int = HISTORY_SIZE):
+        self.data = np.zeros((size, N_FIELDS), dtype=np.float64)
+        self.size = size
+        self.head = 0       # next write index
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    def append(self, snap: BookSnapshot):
+        self.data[self.head] = _row_values(snap)
+        self.head = (self.head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def row(self, i: int) -> np.ndarray:
+        """Raw row for history[i] (a view — don't keep it across appends)."""
+        if not -self.count <= i < self.count:
+            raise IndexError(i)
+        base = self.head if i < 0 else self.head - self.count
+        return self.data[(base + i) % self.size]
+
+    def __getitem__(self, i: int) -> BookSnapshot:
+        return BookSnapshot(*self.row(i)[:TOTAL_DEPTH].tolist())
+
+
+# analyze() trigger flags, filled by _analyze_kernel
+(F_JUMP_UP, F_JUMP_DOWN, F_DEPTH_DROP,
+ F_VANISH_UP_BIDS, F_VANISH_UP_ASKS, F_VANISH_DOWN_BIDS, F_VANISH_DOWN_ASKS,
+ F_SPREAD_UP, F_SPREAD_DOWN) = range(9)
+N_FLAGS = 9
+F_VANISH = slice(F_VANISH_UP_BIDS, F_VANISH_DOWN_ASKS + 1)
+
+
+def _analyze_kernel_py(history: np.ndarray, head: int, count: int, now: np.ndarray, out: np.ndarray) -> None:
+    """
+    Pure-numeric pass over the history ring and the new snapshot row: sets out[F_*]
+    for every check that would fire. The _check_* methods build the actual alerts.
+    """
+    size = history.shape[0]
+    prev = history[(head - 1) % size]
+    out[:] = False
+
+    btc_pct = abs(now[BTC] - prev[BTC]) / prev[BTC] * 100 if prev[BTC] != 0.0 else 0.0
+    for k in range(2):  # UP, DOWN: bid/ask columns and flags are laid out pairwise
+        bid, ask = now[BID_UP + 2 * k], now[ASK_UP + 2 * k]
+        prev_bid, prev_ask = prev[BID_UP + 2 * k], prev[ASK_UP + 2 * k]
+
+        # Price jump; a one-sided book's mid is whichever side is quoted
+        mid_now = (bid + ask) / 2 if bid != 0.0 and ask != 0.0 else (bid if bid != 0.0 else ask)
+        mid_prev = (prev_bid + prev_ask) / 2 if prev_bid != 0.0 and prev_ask != 0.0 else (
+            prev_bid if prev_bid != 0.0 else prev_ask)
+        out[F_JUMP_UP + k] = (btc_pct < BTC_MOVE_THRESHOLD_PCT and mid_now != 0.0 and mid_prev != 0.0
+                              and abs(mid_now - mid_prev) >= PRICE_JUMP_THRESHOLD)
+
+        # Spread blowout; needs both sides quoted on both ticks
+        spread_now, spread_prev = ask - bid, prev_ask - prev_bid
+        out[F_SPREAD_UP + k] = (bid != 0.0 and ask != 0.0 and prev_bid != 0.0 and prev_ask != 0.0
+                                and spread_prev > 0 and spread_now / spread_prev >= SPREAD_EXPANSION_THRESHOLD
+                                and spread_now >= SPREAD_MIN_WIDTH)
+
+    if count >= DEPTH_DROP_WINDOW:
+        ref_depth = history[(head - DEPTH_DROP_WINDOW) % size, TOTAL_DEPTH]
+        out[F_DEPTH_DROP] = ref_depth >= 1 and (ref_depth - now[TOTAL_DEPTH]) / ref_depth >= DEPTH_DROP_PCT
+
+    for i in range(4):
+        out[F_VANISH_UP_BIDS + i] = prev[DEPTH_UP_BIDS + i] - now[DEPTH_UP_BIDS + i] >= VOLUME_VANISH_THRESHOLD
+
+
+# JIT the kernel when numba is available. A mypyc-compiled build has no bytecode for
+# numba to read, so it keeps the (already native) compiled function.
+_analyze_kernel: Callable[[np.ndarray, int, int, np.ndarray, np.ndarray], None] = _analyze_kernel_py
+if numba is not None and hasattr(_analyze_kernel_py, "__code__"):
+    _analyze_kernel = numba.njit(cache=True)(_analyze_kernel_py)
+
+
+@dataclass(slots=True)
 class Alert:
     ts: float
     alert_type: str
@@ -112,6 +260,23 @@ class Alert:
     data: dict = field(default_factory=dict)
 
 
+def _severity(ladder: tuple, value: float) -> str:
+    """First rung of a *_SEVERITY ladder that value reaches (the lowest rung if none)."""
+    for threshold, severity in ladder:
+        if value >= threshold:
+            return severity
+    return ladder[-1][1]
+
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass
+    return json.dumps(obj, default=str).encode()
+
+
 # ---------------------------------------------------------------------------
 # Detector
 # ---------------------------------------------------------------------------
@@ -119,59 +284,193 @@ class ManipulationDetector:
     def __init__(self, client: PolymarketClient, feed: BinanceFeed, trade_enabled: bool = False):
         self.client = client
         self.feed = feed
+        self._get_price = feed.get_price    # bound once; read on every book update
         self.trade_enabled = trade_enabled
-        self.history: deque[BookSnapshot] = deque(maxlen=HISTORY_SIZE)
-        self.alerts: list[Alert] = []
-        self.last_alert_time: dict[str, float] = {}
+        self.history = SnapshotRing(HISTORY_SIZE)
+        self._flags = np.zeros(N_FLAGS, dtype=np.bool_)
+        self._last_fp: tuple | None = None     # book + history position at the last full analyze()
+        self.alerts: deque[Alert] = deque(maxlen=ALERT_HISTORY_SIZE)
+        # Cooldowns run on the monotonic clock; alert.ts stays wall-clock for the log
+        self.last_alert_ns: dict[str, int] = dict.fromkeys(ALERT_TYPES, -ALERT_COOLDOWN_NS)
+        self._now_ns = time.monotonic_ns()  # sampled once per analyze() pass
+        self.last_trade_ns: dict[str, int] = {}  # token_id bought -> time of the last counter-trade
         self.window: Window | None = None
         self.start_price: float | None = None
         self.alert_count = 0
         self.trade_count = 0
-
-    def _get_full_book(self, window: Window) -> BookSnapshot | None:
-        """Get orderbook with full depth info."""
-        btc = self.feed.get_price()
-        if btc is None:
-            return None
+        self._trade_sem = asyncio.Semaphore(1)    # one counter-trade in flight at a time
+        self._trades_in_flight: set[str] = set()  # token_ids with an order queued or being placed
+        self._trade_tasks: set[asyncio.Task] = set()
+        # token_id -> (bids, asks, [bid_depth, ask_depth]), each side price -> size;
+        # kept current by the WS feed, with side totals maintained incrementally
+        self._books: dict[str, tuple[dict[float, float], dict[float, float], list[float]]] = {}
+        self.latest: BookSnapshot | None = None
+        self._alert_fp = open(ALERT_LOG, "ab", buffering=ALERT_LOG_BUFFER)
+        self._alert_dirty = False
+
+    def close(self):
+        """Flush and close the alert log."""
+        self._alert_fp.close()
+
+    # -- Orderbook state ----------------------------------------------------
+
+    def _set_book(self, token_id: str, bids, asks):
+        """Replace a token's book with full (price, size) level lists."""
+        bids = {float(p): float(s) for p, s in bids}
+        asks = {float(p): float(s) for p, s in asks}
+        self._books[token_id] = (bids, asks, [sum(bids.values()), sum(asks.values())])
+
+    async def _fetch_books(self, window: Window) -> bool:
+        """Load both tokens' full books over REST (cold start / resync), fetched concurrently."""
         try:
-            book_up = self.client.clob.get_order_book(window.token_id_up)
-            book_down = self.client.clob.get_order_book(window.token_id_down)
-
-            bids_up = getattr(book_up, "bids", []) or []
-            asks_up = getattr(book_up, "asks", []) or []
-            bids_down = getattr(book_down, "bids", []) or []
-            asks_down = getattr(book_down, "asks", []) or []
-
-            def sum_volume(orders):
-                return sum(float(o.size) for o in orders) if orders else 0.0
-
-            bid_up = float(bids_up[-1].price) if bids_up else 0
-            ask_up = float(asks_up[0].price) if asks_up else 0
-            bid_down = float(bids_down[-1].price) if bids_down else 0
-            ask_down = float(asks_down[0].price) if asks_down else 0
-
-            return BookSnapshot(
-                ts=time.time(),
-                bid_up=bid_up, ask_up=ask_up,
-                bid_down=bid_down, ask_down=ask_down,
-                depth_up_bids=sum_volume(bids_up),
-                depth_up_asks=sum_volume(asks_up),
-                depth_down_bids=sum_volume(bids_down),
-                depth_down_asks=sum_volume(asks_down),
-                btc_price=btc,
+            book_up, book_down = await asyncio.gather(
+                asyncio.to_thread(self.client.clob.get_order_book, window.token_id_up),
+                asyncio.to_thread(self.client.clob.get_order_book, window.token_id_down),
             )
+
+            # OrderBookSummary always has bids/asks; they're None only for an empty side
+            bids_up, asks_up = book_up.bids or (), book_up.asks or ()
+            bids_down, asks_down = book_down.bids or (), book_down.asks or ()
         except Exception as e:
             logger.warning(f"Book fetch failed: {e}")
+            return False
+
+        self._set_book(window.token_id_up, [(o.price, o.size) for o in bids_up], [(o.price, o.size) for o in asks_up])
+        self._set_book(window.token_id_down, [(o.price, o.size) for o in bids_down], [(o.price, o.size) for o in asks_down])
+        return True
+
+    def _apply_market_msg(self, msg: dict) -> bool:
+        """Apply one CLOB market-channel event to the local books. Returns True if a book changed."""
+        event_type = msg.get("event_type")
+        if event_type == "book":
+            if msg.get("asset_id") not in self._books:
+                return False
+            self._set_book(
+                msg["asset_id"],
+                [(lvl["price"], lvl["size"]) for lvl in msg.get("bids") or []],
+                [(lvl["price"], lvl["size"]) for lvl in msg.get("asks") or []],
+            )
+            return True
+        if event_type == "price_change":
+            changes = msg.get("price_changes")
+            if changes is None:  # older schema: one asset per message
+                changes = [{**c, "asset_id": msg.get("asset_id")} for c in msg.get("changes") or []]
+            changed = False
+            for change in changes:
+                book = self._books.get(change.get("asset_id"))
+                if book is None:
+                    continue
+                bids, asks, depth = book
+                side = 0 if change["side"] == "BUY" else 1
+                levels = bids if side == 0 else asks
+                price, size = float(change["price"]), float(change["size"])
+                if size == 0:
+                    old = levels.pop(price, 0.0)
+                else:
+                    old = levels.get(price, 0.0)
+                    levels[price] = size
+                # Reset on empty so rounding in the running total can't accumulate
+                depth[side] = depth[side] + size - old if levels else 0.0
+                changed = True
+            return changed
+        return False
+
+    def _snapshot(self, window: Window, btc: float) -> BookSnapshot:
+        """Build a BookSnapshot from the local books."""
+        bids_up, asks_up, depth_up = self._books.get(window.token_id_up, ({}, {}, [0.0, 0.0]))
+        bids_down, asks_down, depth_down = self._books.get(window.token_id_down, ({}, {}, [0.0, 0.0]))
+
+        return BookSnapshot(
+            ts=time.time(),
+            bid_up=max(bids_up) if bids_up else 0,
+            ask_up=min(asks_up) if asks_up else 0,
+            bid_down=max(bids_down) if bids_down else 0,
+            ask_down=min(asks_down) if asks_down else 0,
+            depth_up_bids=depth_up[0],
+            depth_up_asks=depth_up[1],
+            depth_down_bids=depth_down[0],
+            depth_down_asks=depth_down[1],
+            btc_price=btc,
+        )
+
+    async def _get_full_book(self, window: Window) -> BookSnapshot | None:
+        """Get orderbook with full depth info over REST (cold start / no-websocket fallback)."""
+        btc = self._get_price()
+        if btc is None:
+            return None
+        if not await self._fetch_books(window):
             return None
+        return self._snapshot(window, btc)
+
+    def _on_snapshot(self, snap: BookSnapshot):
+        self.analyze(snap)
+        if self._alert_dirty:
+            # One flush per tick covers every alert that tick fired
+            self._alert_dirty = False
+            try:
+                self._alert_fp.flush()
+            except Exception:
+                pass
+        # History stays sampled at POLL_INTERVAL so per-tick thresholds keep their meaning
+        if not self.history or snap.ts - self.history.row(-1)[TS] >= POLL_INTERVAL:
+            self.history.append(snap)
+        self.latest = snap
+
+    def _on_book_change(self, window: Window):
+        btc = self._get_price()
+        if btc is not None:
+            self._on_snapshot(self._snapshot(window, btc))
+
+    async def watch_books(self, window: Window):
+        """
+        Keep the window's books current from the CLOB market WebSocket and run
+        analyze() on every change. Each (re)connect resyncs from REST first.
+        Falls back to REST polling every POLL_INTERVAL without websockets.
+        """
+        self._books = {window.token_id_up: ({}, {}, [0.0, 0.0]), window.token_id_down: ({}, {}, [0.0, 0.0])}
+        self.latest = None
+        try:
+            import websockets
+        except ImportError:
+            logger.warning("websockets not installed — polling orderbook over REST")
+            while True:
+                snap = await self._get_full_book(window)
+                if snap is not None:
+                    self._on_snapshot(snap)
+                await asyncio.sleep(POLL_INTERVAL)
+
+        tokens = [window.token_id_up, window.token_id_down]
+        async for ws in websockets.connect(CLOB_MARKET_WS):
+            try:
+                await ws.send(json.dumps({"assets_ids": tokens, "type": "market"}))
+                if await self._fetch_books(window):
+                    self._on_book_change(window)
+                async for raw in ws:
+                    try:
+                        msgs = orjson.loads(raw) if orjson is not None else json.loads(raw)
+                    except ValueError:
+                        continue  # PONG / keepalive
+                    changed = False
+                    stale_ms = 0.0
+                    for msg in msgs if isinstance(msgs, list) else [msgs]:
+                        changed |= self._apply_market_msg(msg)
+                        if msg.get("timestamp"):
+                            stale_ms = max(stale_ms, time.time() * 1000 - int(msg["timestamp"]))
+                    if stale_ms > WS_TS_DELTA_THRESHOLD_MS:
+                        logger.warning(f"Orderbook feed {stale_ms:.0f}ms behind — resyncing")
+                        await ws.close()
+                        break
+                    if changed:
+                        self._on_book_change(window)
+            except websockets.ConnectionClosed:
+                logger.warning("Orderbook feed disconnected — reconnecting")
 
     def _can_alert(self, alert_type: str) -> bool:
-        last = self.last_alert_time.get(alert_type, 0)
-        return time.time() - last >= ALERT_COOLDOWN
+        return self._now_ns - self.last_alert_ns[alert_type] >= ALERT_COOLDOWN_NS
 
     def _fire_alert(self, alert: Alert):
-        if not self._can_alert(alert.alert_type):
-            return
-        self.last_alert_time[alert.alert_type] = alert.ts
+        """Record and log an alert. Callers check _can_alert() first, before building it."""
+        self.last_alert_ns[alert.alert_type] = self._now_ns
         self.alert_count += 1
         self.alerts.append(alert)
 
@@ -180,118 +479,155 @@ class ManipulationDetector:
             f"{icon.get(alert.severity, '⚠️')} [{alert.severity}] {alert.alert_type}: {alert.message}"
         )
         if alert.data:
-            logger.info(f"   Data: {json.dumps(alert.data, default=str)}")
+            logger.info(f"   Data: {_dumps(alert.data).decode()}")
 
-        # Append to JSONL log
+        # Append to JSONL log (buffered; flushed at the end of the tick)
         try:
-            with open(ALERT_LOG, "a") as f:
-                f.write(json.dumps({
-                    "ts": datetime.fromtimestamp(alert.ts, tz=timezone.utc).isoformat(),
-                    "type": alert.alert_type,
-                    "severity": alert.severity,
-                    "message": alert.message,
-                    "data": alert.data,
-                }) + "\n")
+            self._alert_fp.write(_dumps({
+                "ts": datetime.fromtimestamp(alert.ts, tz=timezone.utc).isoformat(),
+                "type": alert.alert_type,
+                "severity": alert.severity,
+                "message": alert.message,
+                "data": alert.data,
+            }) + b"\n")
+            self._alert_dirty = True
         except Exception:
             pass
 
     def analyze(self, snap: BookSnapshot):
         """Run all detectors on the new snapshot."""
-        if len(self.history) < 2:
+        history = self.history
+        if len(history) < 2:
             return
+        self._now_ns = time.monotonic_ns()
 
-        prev = self.history[-1]
-
-        # 1) PRICE JUMP without BTC movement
-        self._check_price_jump(snap, prev)
+        # Book and history unchanged since the last pass: only the BTC-driven check can differ
+        fp = (history.head, history.count, snap.bid_up, snap.ask_up, snap.bid_down, snap.ask_down,
+              snap.depth_up_bids, snap.depth_up_asks, snap.depth_down_bids, snap.depth_down_asks)
+        if fp == self._last_fp:
+            self._check_divergence(snap)
+            return
+        self._last_fp = fp
+
+        flags = self._flags
+        _analyze_kernel(history.data, history.head, history.count, np.array(_row_values(snap)), flags)
+
+        # 1) PRICE JUMP without BTC movement + SPREAD BLOW-OUT, one pass per token
+        up, down = flags[F_JUMP_UP] or flags[F_SPREAD_UP], flags[F_JUMP_DOWN] or flags[F_SPREAD_DOWN]
+        if up or down:
+            prev = history[-1]
+            btc_pct = abs(snap.btc_price - prev.btc_price) / prev.btc_price * 100 if prev.btc_price else 0
+            if up:
+                self._check_token(snap, "UP", snap.mid_up, prev.mid_up, snap.spread_up, prev.spread_up, btc_pct)
+            if down:
+                self._check_token(
+                    snap, "DOWN", snap.mid_down, prev.mid_down, snap.spread_down, prev.spread_down, btc_pct
+                )
 
         # 2) DEPTH DROP (liquidity pulled)
-        self._check_depth_drop(snap)
+        if flags[F_DEPTH_DROP]:
+            self._check_depth_drop(snap)
 
         # 3) VOLUME VANISH (orders cancelled)
-        self._check_volume_vanish(snap, prev)
+        if flags[F_VANISH].any():
+            self._check_volume_vanish(snap)
 
         # 4) PRICE DIVERGENCE from BTC-implied fair value
         self._check_divergence(snap)
 
-        # 5) SPREAD BLOW-OUT
-        self._check_spread(snap, prev)
-
-    def _check_price_jump(self, snap: BookSnapshot, prev: BookSnapshot):
-        """Detect large price moves without corresponding BTC movement."""
-        btc_pct = abs(snap.btc_price - prev.btc_price) / prev.btc_price * 100 if prev.btc_price else 0
-
-        for label, mid_now, mid_prev in [
-            ("UP", snap.mid_up, prev.mid_up),
-            ("DOWN", snap.mid_down, prev.mid_down),
-        ]:
-            if not mid_now or not mid_prev:
-                continue
+    def _check_token(self, snap: BookSnapshot, label: str, mid_now: float, mid_prev: float,
+                     spread_now: float, spread_prev: float, btc_pct: float):
+        """Detect a price move without BTC movement and a spread blowout on one token."""
+        if mid_now and mid_prev:
             delta = abs(mid_now - mid_prev)
             if delta >= PRICE_JUMP_THRESHOLD and btc_pct < BTC_MOVE_THRESHOLD_PCT:
-                direction = "↑" if mid_now > mid_prev else "↓"
-                severity = "CRITICAL" if delta >= 0.20 else "HIGH" if delta >= 0.15 else "MEDIUM"
+                alert_type = f"PRICE_JUMP_{label}"
+                if self._can_alert(alert_type):
+                    direction = "↑" if mid_now > mid_prev else "↓"
+                    severity = _severity(PRICE_JUMP_SEVERITY, delta)
+                    self._fire_alert(Alert(
+                        ts=snap.ts,
+                        alert_type=alert_type,
+                        severity=severity,
+                        message=(
+                            f"{label} mid {direction} ${mid_prev:.3f} → ${mid_now:.3f} "
+                            f"(Δ={delta:.3f}) but BTC only moved {btc_pct:.4f}%"
+                        ),
+                        data={
+                            "token": label, "mid_prev": mid_prev, "mid_now": mid_now,
+                            "delta": delta, "btc_pct_move": btc_pct,
+                            "btc": snap.btc_price, "direction": direction,
+                        },
+                    ))
+                # Counter-trade opportunity
+                if self.trade_enabled and delta >= COUNTER_TRADE_EDGE:
+                    self._counter_trade(snap, label, mid_now, mid_prev)
+
+        # Spread blowout (market maker pulling quotes); spreads are 0 unless both sides quoted
+        if spread_now and spread_prev > 0:
+            spread_expansion = spread_now / spread_prev
+            alert_type = f"SPREAD_BLOWOUT_{label}"
+            if (spread_expansion >= SPREAD_EXPANSION_THRESHOLD and spread_now >= SPREAD_MIN_WIDTH
+                    and self._can_alert(alert_type)):
+                severity = _severity(SPREAD_SEVERITY, spread_expansion)
                 self._fire_alert(Alert(
                     ts=snap.ts,
-                    alert_type=f"PRICE_JUMP_{label}",
+                    alert_type=alert_type,
                     severity=severity,
                     message=(
-                        f"{label} mid {direction} ${mid_prev:.3f} → ${mid_now:.3f} "
-                        f"(Δ={delta:.3f}) but BTC only moved {btc_pct:.4f}%"
+                        f"{label} spread {spread_expansion:.1f}x wider: "
+                        f"${spread_prev:.3f} → ${spread_now:.3f}"
                     ),
                     data={
-                        "token": label, "mid_prev": mid_prev, "mid_now": mid_now,
-                        "delta": delta, "btc_pct_move": btc_pct,
-                        "btc": snap.btc_price, "direction": direction,
+                        "token": label, "spread_prev": spread_prev,
+                        "spread_now": spread_now, "expansion": spread_expansion,
                     },
                 ))
-                # Counter-trade opportunity
-                if self.trade_enabled and delta >= COUNTER_TRADE_EDGE:
-                    self._counter_trade(snap, label, mid_now, mid_prev)
 
     def _check_depth_drop(self, snap: BookSnapshot):
         """Detect sudden liquidity disappearance."""
         if len(self.history) < DEPTH_DROP_WINDOW:
             return
-        ref = self.history[-DEPTH_DROP_WINDOW]
-        if ref.total_depth < 1:
+        ref_depth = float(self.history.row(-DEPTH_DROP_WINDOW)[TOTAL_DEPTH])
+        if ref_depth < 1:
             return
-        drop_pct = (ref.total_depth - snap.total_depth) / ref.total_depth
-        if drop_pct >= DEPTH_DROP_PCT:
-            severity = "CRITICAL" if drop_pct >= 0.70 else "HIGH" if drop_pct >= 0.55 else "MEDIUM"
+        drop_pct = (ref_depth - snap.total_depth) / ref_depth
+        if drop_pct >= DEPTH_DROP_PCT and self._can_alert("DEPTH_DROP"):
+            severity = _severity(DEPTH_DROP_SEVERITY, drop_pct)
             self._fire_alert(Alert(
                 ts=snap.ts,
                 alert_type="DEPTH_DROP",
                 severity=severity,
                 message=(
                     f"Orderbook depth dropped {drop_pct:.0%}: "
-                    f"{ref.total_depth:.0f} → {snap.total_depth:.0f} shares "
+                    f"{ref_depth:.0f} → {snap.total_depth:.0f} shares "
                     f"(over {DEPTH_DROP_WINDOW * POLL_INTERVAL:.0f}s)"
                 ),
                 data={
-                    "depth_before": ref.total_depth, "depth_after": snap.total_depth,
+                    "depth_before": ref_depth, "depth_after": snap.total_depth,
                     "drop_pct": drop_pct,
                 },
             ))
 
-    def _check_volume_vanish(self, snap: BookSnapshot, prev: BookSnapshot):
+    def _check_volume_vanish(self, snap: BookSnapshot):
         """Detect large volume disappearing from one side."""
-        for label, now_v, prev_v in [
-            ("UP_BIDS", snap.depth_up_bids, prev.depth_up_bids),
-            ("UP_ASKS", snap.depth_up_asks, prev.depth_up_asks),
-            ("DOWN_BIDS", snap.depth_down_bids, prev.depth_down_bids),
-            ("DOWN_ASKS", snap.depth_down_asks, prev.depth_down_asks),
-        ]:
-            vanished = prev_v - now_v
-            if vanished >= VOLUME_VANISH_THRESHOLD:
-                severity = "HIGH" if vanished >= 100 else "MEDIUM"
-                self._fire_alert(Alert(
-                    ts=snap.ts,
-                    alert_type=f"VOLUME_VANISH_{label}",
-                    severity=severity,
-                    message=f"{label}: {vanished:.0f} shares vanished ({prev_v:.0f} → {now_v:.0f})",
-                    data={"side": label, "before": prev_v, "after": now_v, "vanished": vanished},
-                ))
+        prev_v = self.history.row(-1)[DEPTH_COLS]
+        now_v = np.array((snap.depth_up_bids, snap.depth_up_asks, snap.depth_down_bids, snap.depth_down_asks))
+        vanished = prev_v - now_v
+        for i in np.flatnonzero(vanished >= VOLUME_VANISH_THRESHOLD).tolist():
+            label = DEPTH_LABELS[i]
+            alert_type = f"VOLUME_VANISH_{label}"
+            if not self._can_alert(alert_type):
+                continue
+            v, before, after = float(vanished[i]), float(prev_v[i]), float(now_v[i])
+            severity = _severity(VOLUME_VANISH_SEVERITY, v)
+            self._fire_alert(Alert(
+                ts=snap.ts,
+                alert_type=alert_type,
+                severity=severity,
+                message=f"{label}: {v:.0f} shares vanished ({before:.0f} → {after:.0f})",
+                data={"side": label, "before": before, "after": after, "vanished": v},
+            ))
 
     def _check_divergence(self, snap: BookSnapshot):
         """Check if orderbook prices diverge from what BTC price implies."""
@@ -301,7 +637,8 @@ class ManipulationDetector:
         btc_delta_pct = (snap.btc_price - self.start_price) / self.start_price * 100
         # Rough mapping: each 0.01% BTC move ≈ some probability shift
         # If BTC is solidly up but UP token is cheap, something is wrong
-        if btc_delta_pct > 0.03 and snap.mid_up and snap.mid_up < (0.50 - DIVERGENCE_THRESHOLD):
+        if (btc_delta_pct > 0.03 and snap.mid_up and snap.mid_up < (0.50 - DIVERGENCE_THRESHOLD)
+                and self._can_alert("DIVERGENCE_UP_CHEAP")):
             self._fire_alert(Alert(
                 ts=snap.ts,
                 alert_type="DIVERGENCE_UP_CHEAP",
@@ -312,7 +649,8 @@ class ManipulationDetector:
                 ),
                 data={"btc_delta_pct": btc_delta_pct, "mid_up": snap.mid_up, "btc": snap.btc_price},
             ))
-        elif btc_delta_pct < -0.03 and snap.mid_down and snap.mid_down < (0.50 - DIVERGENCE_THRESHOLD):
+        elif (btc_delta_pct < -0.03 and snap.mid_down and snap.mid_down < (0.50 - DIVERGENCE_THRESHOLD)
+                and self._can_alert("DIVERGENCE_DOWN_CHEAP")):
             self._fire_alert(Alert(
                 ts=snap.ts,
                 alert_type="DIVERGENCE_DOWN_CHEAP",
@@ -324,33 +662,33 @@ class ManipulationDetector:
                 data={"btc_delta_pct": btc_delta_pct, "mid_down": snap.mid_down, "btc": snap.btc_price},
             ))
 
-    def _check_spread(self, snap: BookSnapshot, prev: BookSnapshot):
-        """Detect spread blowouts (market maker pulling quotes)."""
-        for label, bid, ask, prev_bid, prev_ask in [
-            ("UP", snap.bid_up, snap.ask_up, prev.bid_up, prev.ask_up),
-            ("DOWN", snap.bid_down, snap.ask_down, prev.bid_down, prev.ask_down),
-        ]:
-            if not (bid and ask and prev_bid and prev_ask):
-                continue
-            spread_now = ask - bid
-            spread_prev = prev_ask - prev_bid
-            if spread_prev > 0:
-                spread_expansion = spread_now / spread_prev
-                if spread_expansion >= 3.0 and spread_now >= 0.10:
-                    severity = "HIGH" if spread_expansion >= 5 else "MEDIUM"
-                    self._fire_alert(Alert(
-                        ts=snap.ts,
-                        alert_type=f"SPREAD_BLOWOUT_{label}",
-                        severity=severity,
-                        message=(
-                            f"{label} spread {spread_expansion:.1f}x wider: "
-                            f"${spread_prev:.3f} → ${spread_now:.3f}"
-                        ),
-                        data={
-                            "token": label, "spread_prev": spread_prev,
-                            "spread_now": spread_now, "expansion": spread_expansion,
-                        },
-                    ))
+    def _trade_cooling_down(self, token_id: str) -> bool:
+        last = self.last_trade_ns.get(token_id)
+        return last is not None and self._now_ns - last < COUNTER_TRADE_COOLDOWN_NS
+
+    def _submit_counter_trade(self, token_id: str, price: float, size: float):
+        """Place the order in the background so analyze() never waits on the CLOB."""
+        if token_id in self._trades_in_flight:
+            logger.info("  ⏭️  Counter-trade skipped: an order for this token is already in flight")
+            return
+        self._trades_in_flight.add(token_id)
+        self.last_trade_ns[token_id] = self._now_ns
+        task = asyncio.get_running_loop().create_task(self._place_counter_trade(token_id, price, size))
+        self._trade_tasks.add(task)
+        task.add_done_callback(self._trade_tasks.discard)
+
+    async def _place_counter_trade(self, token_id: str, price: float, size: float):
+        try:
+            async with self._trade_sem:
+                order_id = await asyncio.to_thread(self.client.place_limit_buy, token_id, price, size)
+        except Exception as e:
+            logger.warning(f"Counter-trade failed: {e}")
+            return
+        finally:
+            self._trades_in_flight.discard(token_id)
+        if order_id:
+            self.trade_count += 1
+            logger.info(f"  ✅ Counter-trade placed: {order_id}")
 
     def _counter_trade(self, snap: BookSnapshot, token_label: str, mid_now: float, mid_prev: float):
         """Place a counter-trade against detected manipulation."""
@@ -371,17 +709,14 @@ class ManipulationDetector:
                 return
 
             size = round(COUNTER_TRADE_SIZE / buy_price, 1)
-            if size < 1:
+            if size < 1 or self._trade_cooling_down(token_id):
                 return
 
             logger.info(
                 f"  💰 COUNTER-TRADE: BUY {token_label} @ ${buy_price:.2f} x{size:.1f} "
                 f"(manipulation pushed price down ${mid_prev:.3f}→${mid_now:.3f})"
             )
-            order_id = self.client.place_limit_buy(token_id, buy_price, size)
-            if order_id:
-                self.trade_count += 1
-                logger.info(f"  ✅ Counter-trade placed: {order_id}")
+            self._submit_counter_trade(token_id, buy_price, size)
         else:
             # Token got more expensive — buy the OTHER side
             if token_label == "UP":
@@ -395,7 +730,7 @@ class ManipulationDetector:
                 return
 
             size = round(COUNTER_TRADE_SIZE / buy_price, 1)
-            if size < 1:
+            if size < 1 or self._trade_cooling_down(token_id):
                 return
 
             other = "DOWN" if token_label == "UP" else "UP"
@@ -403,16 +738,13 @@ class ManipulationDetector:
                 f"  💰 COUNTER-TRADE: BUY {other} @ ${buy_price:.2f} x{size:.1f} "
                 f"(manipulation inflated {token_label} ${mid_prev:.3f}→${mid_now:.3f})"
             )
-            order_id = self.client.place_limit_buy(token_id, buy_price, size)
-            if order_id:
-                self.trade_count += 1
-                logger.info(f"  ✅ Counter-trade placed: {order_id}")
+            self._submit_counter_trade(token_id, buy_price, size)
 
 
 # ---------------------------------------------------------------------------
 # Main loop
 # ---------------------------------------------------------------------------
-async def run(args):
+async def run(args: argparse.Namespace):
     feed = BinanceFeed()
     client = PolymarketClient()
     detector = ManipulationDetector(client, feed, trade_enabled=args.trade)
@@ -431,14 +763,16 @@ async def run(args):
 
     logger.info(f"✅ BTC price: ${feed.get_price():.2f}")
     logger.info(f"🔍 Manipulation detector started | trade={'ON' if args.trade else 'OFF'}")
-    logger.info(f"   Poll interval: {POLL_INTERVAL}s | Price jump threshold: ${PRICE_JUMP_THRESHOLD}")
+    logger.info(f"   Orderbook: CLOB WebSocket (REST fallback every {POLL_INTERVAL}s) | Price jump threshold: ${PRICE_JUMP_THRESHOLD}")
     logger.info(f"   Depth drop threshold: {DEPTH_DROP_PCT:.0%} | Volume vanish: {VOLUME_VANISH_THRESHOLD} shares")
 
     window = None
-    last_status = 0
+    book_task: asyncio.Task | None = None
+    last_status = 0.0
 
     try:
         while True:
+            now = time.time()
             # Get or refresh window
             if window is None or window.is_expired:
                 ts = current_window_timestamp()
@@ -449,32 +783,46 @@ async def run(args):
                     btc = feed.get_price()
                     detector.start_price = btc
                     detector.history.clear()
+                    detector.last_trade_ns.clear()  # keyed by token_id, which changes every window
+                    if book_task:
+                        book_task.cancel()
+                    book_task = asyncio.create_task(detector.watch_books(w))
                     logger.info(f"📊 Window {w.slug} | S0=${btc:.2f} | tau={w.tau:.0f}s")
                 else:
+                    # Stop watching the expired market until the next one is live
+                    if book_task:
+                        book_task.cancel()
+                        try:
+                            await book_task
+                        except (asyncio.CancelledError, Exception):
+                            pass
+                        book_task = None
+                    window = None
+                    detector.window = None
+                    detector.latest = None
                     # Try next window
                     nxt = next_window_timestamp()
-                    wait = nxt - time.time()
+                    wait = nxt - now
                     if wait > 0:
-                        if time.time() - last_status > 30:
+                        if now - last_status > 30:
                             logger.info(f"⏳ Next window in {wait:.0f}s")
-                            last_status = time.time()
+                            last_status = now
                         await asyncio.sleep(min(wait + 1, 10))
                     else:
                         await asyncio.sleep(5)
                     continue
 
-            # Poll orderbook
-            snap = detector._get_full_book(window)
+            if book_task is not None and book_task.done() and not book_task.cancelled():
+                logger.error(f"Orderbook feed stopped: {book_task.exception()!r} — restarting")
+                book_task = asyncio.create_task(detector.watch_books(window))
+
+            # Analysis runs in watch_books on every book update
+            snap = detector.latest
             if snap is None:
                 await asyncio.sleep(POLL_INTERVAL)
                 continue
 
-            # Run analysis
-            detector.analyze(snap)
-            detector.history.append(snap)
-
             # Status line every 30s
-            now = time.time()
             if now - last_status >= 30:
                 logger.info(
                     f"📈 BTC=${snap.btc_price:.2f} | UP mid=${snap.mid_up:.3f} DOWN mid=${snap.mid_down:.3f} "
@@ -495,6 +843,9 @@ async def run(args):
         pass
     finally:
         logger.info(f"=== DETECTOR STOPPED | {detector.alert_count} alerts | {detector.trade_count} counter-trades ===")
+        if book_task:
+            book_task.cancel()
+        detector.close()
         feed.stop()
         feed_task.cancel()
         try:
@@ -526,6 +877,7 @@ def main():
         loop.run_until_complete(run(args))
     finally:
         loop.close()
+        log_listener.stop()
 
 
 if __name__ == "__main__":
@@ -13,15 +13,27 @@ import json
 import os
 import sys
 import time
-from collections import defaultdict
-from datetime import datetime, timezone, timedelta
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
 from pathlib import Path
 
-from web3 import Web3
+import aiohttp
+from web3 import AsyncHTTPProvider, AsyncWeb3, Web3, WebSocketProvider
+
+try:
+    import orjson
+except ImportError:  # optional — faster event serialization and replay
+    orjson = None  # type: ignore[assignment]
+
+try:
+    from signal import emit as signal_emit, NONCE_INCREMENT, SUSPICIOUS_TIMING, NEW_EXPLOITER, INFO, WARNING
+except ImportError:  # signal module optional
+    signal_emit = None  # type: ignore[assignment]
 
 # ─── Config ───────────────────────────────────────────────────────────────────
 CTF_EXCHANGE = "0x4bFb41d5B3570DeFd03C39a9A4D8dE6Bd8B8982E"
 INCREMENT_NONCE_SIG = "0x627cdcb9"
+INCREMENT_NONCE_SELECTOR = bytes.fromhex(INCREMENT_NONCE_SIG[2:])  # tx input from web3 is HexBytes
 
 # Free Polygon RPCs (polling fallback)
 HTTP_RPCS = [
@@ -32,56 +44,152 @@ HTTP_RPCS = [
     "https://polygon-rpc.com",
 ]
 
+# One keep-alive aiohttp session (created in main) is shared by every RPC provider,
+# so polls reuse TCP/TLS connections
+RPC_POOL_SIZE = 16
+RPC_TIMEOUT = 10
+RPC_CONCURRENCY = 8  # max RPC calls in flight from one scan
+
 # Polling interval in seconds
 POLL_INTERVAL = 2
 
+# newHeads over WSS wakes the poller as soon as a block lands; scans still go over HTTP.
+# Free WSS endpoints drop often, so polling every POLL_INTERVAL stays on as the fallback.
+WSS_RPCS = [
+    "wss://polygon-bor-rpc.publicnode.com",
+    "wss://polygon.drpc.org",
+]
+HEAD_TIMEOUT = 10        # poll anyway if a live subscription goes this long without a head
+WSS_RETRY_INTERVAL = 30  # wait before re-subscribing after every WSS endpoint failed
+
+# incrementNonce() emits no event, so eth_getLogs can't see it. Where the RPC supports
+# trace_filter we ask it for calls to the exchange instead of downloading full blocks.
+SCAN_CHUNK_BLOCKS = 100  # max block range per scan (and per trace_filter request)
+BLOCK_BATCH_SIZE = 25    # full blocks per JSON-RPC batch; halved when the RPC rejects a batch, +1 per success
+BATCH_RETRY_INTERVAL = 300  # seconds a rejected batch size stays off-limits before it is tried again
+# How nodes reject a whole batch: JSON-RPC invalid request (-32600, e.g. geth's "batch too
+# large") or limit exceeded (-32005), or one of these phrases in the error message
+BATCH_REJECT_CODES = (-32600, -32005)
+BATCH_REJECT_PHRASES = (
+    "batch not supported", "batch requests", "batch too large", "batch size", "batch limit",
+    "too large", "too many requests", "rate limit",
+)
+
 # Data directory
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
 EVENTS_FILE = DATA_DIR / "nonce_events.jsonl"
+STATS_FILE = DATA_DIR / "nonce_stats.json"  # NonceStats checkpoint + how much of EVENTS_FILE it covers
+EVENTS_BUFFER = 1 << 16   # events file write buffer; flushed once per poll tick
+EVENTS_FLUSH_EVERY = 64   # ...or sooner if a big catch-up scan logs this many events
+
+_events_fh = None
+_events_pending = 0
+
+
+def _get_events_fh():
+    global _events_fh
+    if _events_fh is None:
+        _events_fh = open(EVENTS_FILE, "ab", buffering=EVENTS_BUFFER)
+    return _events_fh
+
+
+def flush_events():
+    """Push buffered events to disk so blacklist.py sees them."""
+    global _events_pending
+    if _events_fh is not None and _events_pending:
+        _events_fh.flush()
+        _events_pending = 0
 
 # ─── BTC 5-min window helpers ────────────────────────────────────────────────
+_last_window: tuple = (None, None)  # (ts, window) — calls in the same block share a timestamp
+
+
+def _hms(secs: int) -> str:
+    h, rem = divmod(secs % 86400, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}"
+
+
 def get_btc_window(ts: float) -> dict:
     """Calculate current BTC 5-min market window from a unix timestamp."""
-    dt = datetime.fromtimestamp(ts, tz=timezone.utc)
-    # Windows are aligned to 5-min marks from midnight UTC
-    total_seconds = dt.hour * 3600 + dt.minute * 60 + dt.second
-    window_start_secs = (total_seconds // 300) * 300
-    window_end_secs = window_start_secs + 300
-    
-    window_start = dt.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(seconds=window_start_secs)
-    window_end = dt.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(seconds=window_end_secs)
-    
-    remaining = (window_end - dt).total_seconds()
-    elapsed = (dt - window_start).total_seconds()
-    
-    return {
-        "window_start": window_start.strftime("%H:%M:%S"),
-        "window_end": window_end.strftime("%H:%M:%S"),
+    global _last_window
+    if _last_window[0] == ts:
+        return _last_window[1]
+
+    # Windows are aligned to 5-min marks from midnight UTC; unix time has no leap seconds
+    secs_today = ts % 86400
+    window_start_secs = (int(secs_today) // 300) * 300
+    elapsed = secs_today - window_start_secs
+    remaining = 300 - elapsed
+
+    window = {
+        "window_start": _hms(window_start_secs),
+        "window_end": _hms(window_start_secs + 300),
         "remaining_secs": round(remaining, 1),
         "elapsed_secs": round(elapsed, 1),
         "pct_elapsed": round(elapsed / 300 * 100, 1),
     }
+    _last_window = (ts, window)
+    return window
 
 # ─── Statistics tracker ──────────────────────────────────────────────────────
+HOURLY_HISTORY = 48  # hourly buckets kept for the summary (it prints the last 12)
+
+
 class NonceStats:
+    """Running aggregates only — memory stays O(callers), not O(events).
+
+    Single-writer: only touched from the event loop (poll task adds, stats task reads),
+    so it needs no lock.
+    """
+
     def __init__(self):
-        self.events: list[dict] = []
-        self.by_address: defaultdict[str, list] = defaultdict(list)
+        self.total = 0
+        self.calls_by_address: Counter[str] = Counter()
+        self.remaining_by_address: defaultdict[str, float] = defaultdict(float)  # sum of remaining_secs
         self.hourly_counts: defaultdict[str, int] = defaultdict(int)
-        self.window_timing: list[float] = []  # seconds remaining when nonce was called
+        self.timing_buckets = [0, 0, 0]  # calls with <30s, 30-150s, 150s+ left in the window
     
     def add(self, event: dict):
-        self.events.append(event)
+        """Count one event. A malformed event raises KeyError/TypeError/ValueError and changes nothing."""
         addr = event["caller"]
-        self.by_address[addr].append(event)
-        hour_key = event["timestamp"][:13]  # YYYY-MM-DDTHH
+        timestamp = event["timestamp"]
+        if not isinstance(addr, str) or not isinstance(timestamp, str):
+            raise TypeError("caller and timestamp must be strings")
+        remaining = float(event["window"]["remaining_secs"])
+        hour_key = timestamp[:13]  # YYYY-MM-DDTHH
+
+        self.total += 1
+        self.calls_by_address[addr] += 1
+        self.remaining_by_address[addr] += remaining
+        if hour_key not in self.hourly_counts and len(self.hourly_counts) >= HOURLY_HISTORY:
+            del self.hourly_counts[min(self.hourly_counts)]
         self.hourly_counts[hour_key] += 1
-        self.window_timing.append(event["window"]["remaining_secs"])
+        self.timing_buckets[0 if remaining < 30 else 1 if remaining < 150 else 2] += 1
     
+    def to_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "calls_by_address": dict(self.calls_by_address),
+            "remaining_by_address": dict(self.remaining_by_address),
+            "hourly_counts": dict(self.hourly_counts),
+            "timing_buckets": self.timing_buckets,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "NonceStats":
+        stats = cls()
+        stats.total = d["total"]
+        stats.calls_by_address.update(d["calls_by_address"])
+        stats.remaining_by_address.update(d["remaining_by_address"])
+        stats.hourly_counts.update(d["hourly_counts"])
+        stats.timing_buckets = list(d["timing_buckets"])
+        return stats
+
     def print_summary(self):
-        total = len(self.events)
+        total = self.total
         if total == 0:
             return
         
@@ -90,16 +198,13 @@ class NonceStats:
         print("=" * 70)
         
         # Top callers
-        sorted_addrs = sorted(self.by_address.items(), key=lambda x: -len(x[1]))
         print("\n🏆 Top incrementNonce callers:")
-        for addr, evts in sorted_addrs[:15]:
-            avg_remaining = sum(e["window"]["remaining_secs"] for e in evts) / len(evts)
-            print(f"  {addr}: {len(evts)} calls (avg {avg_remaining:.0f}s before window end)")
+        for addr, calls in self.calls_by_address.most_common(15):
+            avg_remaining = self.remaining_by_address[addr] / calls
+            print(f"  {addr}: {calls} calls (avg {avg_remaining:.0f}s before window end)")
         
         # Timing distribution
-        near_expiry = sum(1 for r in self.window_timing if r < 30)
-        mid_window = sum(1 for r in self.window_timing if 30 <= r < 150)
-        early_window = sum(1 for r in self.window_timing if r >= 150)
+        near_expiry, mid_window, early_window = self.timing_buckets
         print(f"\n⏱  Timing distribution:")
         print(f"  Last 30s of window:  {near_expiry} ({near_expiry/total*100:.0f}%)")
         print(f"  Mid window (30-150s): {mid_window} ({mid_window/total*100:.0f}%)")
@@ -114,9 +219,60 @@ class NonceStats:
         print("=" * 70 + "\n")
 
 
+def save_stats(stats: NonceStats):
+    """Checkpoint stats with the events-file position they cover, so startup replays only newer events."""
+    flush_events()
+    st = EVENTS_FILE.stat() if EVENTS_FILE.exists() else None
+    checkpoint = {
+        "inode": st.st_ino if st else None,
+        "offset": st.st_size if st else 0,
+        **stats.to_dict(),
+    }
+    tmp = STATS_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(checkpoint))
+    os.replace(tmp, STATS_FILE)
+
+
+def load_stats() -> tuple[NonceStats, int]:
+    """Restore the stats checkpoint and replay events appended after it. Returns (stats, events replayed)."""
+    stats, offset = NonceStats(), 0
+    if not EVENTS_FILE.exists():
+        return stats, 0
+    st = EVENTS_FILE.stat()
+    try:
+        checkpoint = json.loads(STATS_FILE.read_text())
+        # A rotated or truncated events file invalidates the checkpoint
+        if checkpoint["inode"] == st.st_ino and checkpoint["offset"] <= st.st_size:
+            stats, offset = NonceStats.from_dict(checkpoint), checkpoint["offset"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # no usable checkpoint — replay the whole file
+
+    count = 0
+    loads = orjson.loads if orjson is not None else json.loads
+    with open(EVENTS_FILE, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            try:
+                stats.add(loads(line))
+                count += 1
+            except (ValueError, KeyError, TypeError):
+                pass  # torn or malformed line
+    return stats, count
+
+
 # ─── Event logging ───────────────────────────────────────────────────────────
+def _event_line(event: dict) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(event, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass  # e.g. an int beyond 64 bits
+    return (json.dumps(event) + "\n").encode()
+
+
 def log_event(event: dict, stats: NonceStats):
     """Log a nonce event to console, file, and emit universal alert signal."""
+    global _events_pending
     stats.add(event)
     
     w = event["window"]
@@ -125,18 +281,22 @@ def log_event(event: dict, stats: NonceStats):
     
     symbol = "🔴" if w["remaining_secs"] < 30 else "🟡" if w["remaining_secs"] < 60 else "🟢"
     
-    print(f"{symbol} incrementNonce | {event['timestamp']} | {caller_short} | "
-          f"window {w['window_start']}-{w['window_end']} | {w['remaining_secs']}s left | "
-          f"{gas_gwei} gwei | tx: {event['tx_hash'][:18]}...")
+    sys.stdout.write(f"{symbol} incrementNonce | {event['timestamp']} | {caller_short} | "
+                     f"window {w['window_start']}-{w['window_end']} | {w['remaining_secs']}s left | "
+                     f"{gas_gwei} gwei | tx: {event['tx_hash'][:18]}...\n")
     
-    with open(EVENTS_FILE, "a") as f:
-        f.write(json.dumps(event) + "\n")
+    _get_events_fh().write(_event_line(event))
+    _events_pending += 1
+    if _events_pending >= EVENTS_FLUSH_EVERY:
+        flush_events()
 
     # Emit universal alert signal
+    if signal_emit is None:
+        return
     try:
-        from signal import emit as signal_emit, NONCE_INCREMENT, SUSPICIOUS_TIMING, NEW_EXPLOITER, INFO, WARNING
         is_late = w["remaining_secs"] < 30
-        is_new = len(stats.by_address.get(event["caller"].lower(), [])) <= 1
+        # stats is keyed by the caller as logged (checksummed), and add() above already counted this call
+        is_new = stats.calls_by_address[event["caller"]] <= 1
         
         code = SUSPICIOUS_TIMING if is_late else (NEW_EXPLOITER if is_new else NONCE_INCREMENT)
         severity = WARNING if is_late else INFO
@@ -157,57 +317,225 @@ def log_event(event: dict, stats: NonceStats):
                 "action": "CANCEL" if is_late else "HOLD",
             },
         )
-    except Exception:
-        pass  # signal module optional
+    except Exception as e:
+        print(f"⚠️  Signal emit failed: {e}")
 
 
 # ─── Block polling monitor ──────────────────────────────────────────────────
-async def poll_blocks(w3: Web3, stats: NonceStats):
-    """Poll recent blocks for incrementNonce transactions."""
-    target = CTF_EXCHANGE.lower()
-    last_block = w3.eth.block_number
-    print(f"📡 Starting block poller from block {last_block}")
-    
+def _nonce_event(caller: str, tx_hash: str, block_number: int, block_time: int, gas_price: int) -> dict:
+    ts = datetime.fromtimestamp(block_time, tz=timezone.utc)
+    return {
+        "timestamp": ts.isoformat(),
+        "caller": caller,
+        "tx_hash": tx_hash,
+        "block": block_number,
+        "gas_price_gwei": round(gas_price / 1e9, 2),
+        "window": get_btc_window(block_time),
+        "source": "confirmed",
+    }
+
+
+async def _trace_filter(w3: AsyncWeb3, from_block: int, to_block: int) -> list:
+    """Call traces to the CTF Exchange in [from_block, to_block]."""
+    resp = await w3.provider.make_request("trace_filter", [{
+        "fromBlock": hex(from_block),
+        "toBlock": hex(to_block),
+        "toAddress": [CTF_EXCHANGE],
+    }])
+    if "error" in resp:
+        raise RuntimeError(f"trace_filter: {resp['error']}")
+    return resp.get("result") or []
+
+
+async def supports_trace_filter(w3: AsyncWeb3, block_number: int) -> bool:
+    try:
+        await _trace_filter(w3, block_number, block_number)
+        return True
+    except Exception:
+        return False
+
+
+async def scan_traces(w3: AsyncWeb3, from_block: int, to_block: int, stats: NonceStats):
+    """Log incrementNonce calls in [from_block, to_block] using trace_filter."""
+    calls = []
+    for trace in await _trace_filter(w3, from_block, to_block):
+        action = trace.get("action") or {}
+        if trace.get("type") != "call" or trace.get("error"):
+            continue  # reverted calls don't bump the nonce
+        if (action.get("input") or "0x").startswith(INCREMENT_NONCE_SIG):
+            calls.append(trace)
+    if not calls:
+        return
+
+    # Timestamps and gas prices for every match, fetched concurrently
+    sem = asyncio.Semaphore(RPC_CONCURRENCY)
+
+    async def fetch(coro):
+        async with sem:
+            return await coro
+
+    block_numbers = sorted({trace["blockNumber"] for trace in calls})
+    results = await asyncio.gather(
+        *(fetch(w3.eth.get_block(bn)) for bn in block_numbers),
+        *(fetch(w3.eth.get_transaction(trace["transactionHash"])) for trace in calls),
+    )
+    block_times = {bn: block.get("timestamp", int(time.time())) for bn, block in zip(block_numbers, results)}
+    txs = results[len(block_numbers):]
+
+    for trace, tx in zip(calls, txs):
+        event = _nonce_event(
+            # msg.sender of the call, i.e. whose nonce moved (a contract wallet for internal calls)
+            Web3.to_checksum_address(trace["action"]["from"]),
+            trace["transactionHash"],
+            trace["blockNumber"],
+            block_times[trace["blockNumber"]],
+            tx.get("gasPrice", 0),
+        )
+        log_event(event, stats)
+
+
+_block_batch_size = BLOCK_BATCH_SIZE
+_batch_ceiling = BLOCK_BATCH_SIZE  # below the smallest recently rejected size
+_batch_ceiling_until = 0.0
+
+
+def _batch_rejected(e: Exception) -> bool:
+    """Too large (413), rate-limited (429) or batches unsupported — worth retrying smaller."""
+    if getattr(e, "status", None) in (413, 429):
+        return True
+    rpc_response = getattr(e, "rpc_response", None)  # web3's Web3RPCError
+    if isinstance(rpc_response, dict):
+        error = rpc_response.get("error")
+        if isinstance(error, dict) and error.get("code") in BATCH_REJECT_CODES:
+            return True
+    msg = str(e).lower()
+    return any(s in msg for s in BATCH_REJECT_PHRASES)
+
+
+async def _get_blocks(w3: AsyncWeb3, from_block: int, to_block: int) -> list:
+    """Full blocks in [from_block, to_block], fetched in JSON-RPC batches."""
+    global _block_batch_size, _batch_ceiling, _batch_ceiling_until
+    if _batch_ceiling < BLOCK_BATCH_SIZE and time.monotonic() >= _batch_ceiling_until:
+        _batch_ceiling = BLOCK_BATCH_SIZE
+        _block_batch_size = max(_block_batch_size, 2)  # let single calls try batching again
+    if _block_batch_size == 1:
+        # Batches rejected outright: plain calls, RPC_CONCURRENCY at a time
+        sem = asyncio.Semaphore(RPC_CONCURRENCY)
+
+        async def fetch(bn):
+            async with sem:
+                return await w3.eth.get_block(bn, full_transactions=True)
+
+        results = await asyncio.gather(*(fetch(bn) for bn in range(from_block, to_block + 1)), return_exceptions=True)
+        # skip a block that fails, as a lone get_block failure always has
+        return [block for block in results if not isinstance(block, BaseException)]
+
+    blocks = []
+    bn = from_block
+    while bn <= to_block:
+        end = min(bn + _block_batch_size - 1, to_block)
+        try:
+            async with w3.batch_requests() as batch:
+                for n in range(bn, end + 1):
+                    batch.add(w3.eth.get_block(n, full_transactions=True))
+                blocks.extend(await batch.async_execute())
+        except Exception as e:
+            if not _batch_rejected(e):
+                raise  # transient (timeout, 5xx): fail the tick, retried next poll at the same size
+            _batch_ceiling = max(1, end - bn)
+            _batch_ceiling_until = time.monotonic() + BATCH_RETRY_INTERVAL
+            _block_batch_size = max(1, min(_block_batch_size // 2, _batch_ceiling))
+            print(f"⚠️  Block batch of {end - bn + 1} failed ({e}) — batch size now {_block_batch_size}")
+            if _block_batch_size == 1:
+                return blocks + await _get_blocks(w3, bn, to_block)
+            continue
+        if _block_batch_size < _batch_ceiling:
+            _block_batch_size += 1
+        bn = end + 1
+    return blocks
+
+
+async def scan_blocks(w3: AsyncWeb3, from_block: int, to_block: int, stats: NonceStats):
+    """Log incrementNonce calls in [from_block, to_block] by scanning full blocks."""
+    for block in await _get_blocks(w3, from_block, to_block):
+        bn = block["number"]
+        block_time = block.get("timestamp", int(time.time()))
+
+        for tx in block.get("transactions", []):
+            if isinstance(tx, bytes):
+                continue  # bare hash — full transactions not returned
+            # web3's formatters hand back a checksummed "to" and HexBytes input, so
+            # compare against the checksummed constant and the raw selector as-is.
+            # startswith, not input[:4]: slicing HexBytes goes through its Python __getitem__.
+            if tx.get("to") == CTF_EXCHANGE and tx.get("input", b"").startswith(INCREMENT_NONCE_SELECTOR):
+                event = _nonce_event(
+                    tx["from"],
+                    "0x" + tx["hash"].hex(),  # HexBytes.hex() has no 0x prefix since hexbytes 1.0
+                    bn,
+                    block_time,
+                    tx.get("gasPrice", 0),
+                )
+                log_event(event, stats)
+
+
+_heads_live = False  # a newHeads subscription is currently delivering
+
+
+async def watch_heads(new_head: asyncio.Event):
+    """Set new_head on every newHeads notification, reconnecting across WSS_RPCS."""
+    global _heads_live
+    while True:
+        for url in WSS_RPCS:
+            try:
+                async with AsyncWeb3(WebSocketProvider(url)) as ws:
+                    await ws.eth.subscribe("newHeads")
+                    print(f"📡 Subscribed to newHeads via {url}")
+                    _heads_live = True
+                    async for _ in ws.socket.process_subscriptions():
+                        new_head.set()
+            except Exception as e:
+                print(f"⚠️  newHeads via {url} failed: {e}")
+            finally:
+                if _heads_live:
+                    _heads_live = False
+                    new_head.set()  # wake the poller so it drops back to POLL_INTERVAL
+        print(f"⚠️  No newHeads subscription — polling every {POLL_INTERVAL}s")
+        await asyncio.sleep(WSS_RETRY_INTERVAL)
+
+
+async def wait_for_head(new_head: asyncio.Event):
+    """Sleep until the next newHeads notification, or POLL_INTERVAL without a subscription."""
+    try:
+        await asyncio.wait_for(new_head.wait(), HEAD_TIMEOUT if _heads_live else POLL_INTERVAL)
+    except asyncio.TimeoutError:
+        pass
+    new_head.clear()
+
+
+async def poll_blocks(w3: AsyncWeb3, stats: NonceStats, new_head: asyncio.Event):
+    """Scan new blocks for incrementNonce transactions as they arrive."""
+    last_block: int = await w3.eth.block_number
+    use_trace = await supports_trace_filter(w3, last_block)
+    scan = scan_traces if use_trace else scan_blocks
+    print(f"📡 Starting block poller from block {last_block} "
+          f"({'trace_filter' if use_trace else 'full-block scan — RPC has no trace_filter'})")
+    sys.stdout.flush()
+
     while True:
         try:
-            current = w3.eth.block_number
-            if current <= last_block:
-                await asyncio.sleep(POLL_INTERVAL)
-                continue
-            
-            for bn in range(last_block + 1, current + 1):
-                try:
-                    block = w3.eth.get_block(bn, full_transactions=True)
-                except Exception:
-                    continue
-                
-                block_time = block.get("timestamp", int(time.time()))
-                
-                for tx in block.get("transactions", []):
-                    if not isinstance(tx, dict):
-                        continue
-                    to_addr = (tx.get("to") or "").lower()
-                    inp = (tx.get("input") or "0x")
-                    
-                    if to_addr == target and inp.startswith(INCREMENT_NONCE_SIG):
-                        ts = datetime.fromtimestamp(block_time, tz=timezone.utc)
-                        event = {
-                            "timestamp": ts.isoformat(),
-                            "caller": tx["from"],
-                            "tx_hash": tx["hash"].hex() if isinstance(tx["hash"], bytes) else tx["hash"],
-                            "block": bn,
-                            "gas_price_gwei": round(tx.get("gasPrice", 0) / 1e9, 2),
-                            "window": get_btc_window(block_time),
-                            "source": "confirmed",
-                        }
-                        log_event(event, stats)
-            
-            last_block = current
-        
+            current = await w3.eth.block_number
+            # Advance per chunk so a failure mid-catch-up doesn't re-log earlier chunks
+            for start in range(last_block + 1, current + 1, SCAN_CHUNK_BLOCKS):
+                end = min(start + SCAN_CHUNK_BLOCKS - 1, current)
+                await scan(w3, start, end, stats)
+                last_block = end
+
         except Exception as e:
             print(f"⚠️  Poll error: {e}")
-        
-        await asyncio.sleep(POLL_INTERVAL)
+
+        flush_events()
+        sys.stdout.flush()  # once per tick rather than per line when piped
+        await wait_for_head(new_head)
 
 
 # ─── Periodic stats printer ─────────────────────────────────────────────────
@@ -216,6 +544,42 @@ async def print_stats_periodically(stats: NonceStats):
     while True:
         await asyncio.sleep(300)
         stats.print_summary()
+        sys.stdout.flush()
+        save_stats(stats)
+
+
+# ─── RPC connection ─────────────────────────────────────────────────────────
+async def _probe(rpc: str, session: aiohttp.ClientSession) -> tuple[str, AsyncWeb3 | None, str]:
+    """Returns (rpc, w3, status line); w3 is None unless the node answered every startup call."""
+    try:
+        provider = AsyncHTTPProvider(rpc, request_kwargs={"timeout": aiohttp.ClientTimeout(total=RPC_TIMEOUT)})
+        await provider.cache_async_session(session)
+        w3 = AsyncWeb3(provider)
+        if await w3.is_connected():
+            return rpc, w3, f"Chain ID: {await w3.eth.chain_id}, Block: {await w3.eth.block_number}"
+        print(f"❌ Failed {rpc}: not connected")
+    except Exception as e:
+        print(f"❌ Failed {rpc}: {e}")
+    return rpc, None, ""
+
+
+async def connect(session: aiohttp.ClientSession) -> AsyncWeb3 | None:
+    """Probe every HTTP RPC at once and keep the first that answers."""
+    probes = [asyncio.create_task(_probe(rpc, session)) for rpc in HTTP_RPCS]
+    try:
+        for probe in asyncio.as_completed(probes):
+            rpc, w3, status = await probe
+            if w3:
+                print(f"✅ Connected to {rpc}")
+                print(f"   {status}")
+                return w3
+    finally:
+        # Losers share the caller's session, so there is nothing per-provider to close;
+        # just make sure no probe is left running against it
+        for probe in probes:
+            probe.cancel()
+        await asyncio.gather(*probes, return_exceptions=True)
+    return None
 
 
 # ─── Main ────────────────────────────────────────────────────────────────────
@@ -227,49 +591,35 @@ async def main():
     print(f"   Output:   {EVENTS_FILE}")
     print("=" * 70)
     
-    # Connect via HTTP (polling mode — free WSS endpoints are unreliable)
-    w3 = None
-    for rpc in HTTP_RPCS:
+    # Connect via HTTP for scanning (WSS is only used to learn about new heads).
+    # The session is closed on every way out, including a failed connect.
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=RPC_POOL_SIZE)) as session:
+        w3 = await connect(session)
+        if not w3:
+            print("💀 Could not connect to any Polygon RPC. Exiting.")
+            sys.exit(1)
+        
+        # Load existing events for stats continuity
+        stats, replayed = load_stats()
+        if stats.total:
+            print(f"📂 Loaded {stats.total} existing events from {EVENTS_FILE.name} "
+                  f"({stats.total - replayed} from the {STATS_FILE.name} checkpoint)")
+        
+        print(f"\n🚀 Monitoring... scanning on each newHeads notification (polling every {POLL_INTERVAL}s without one)\n")
+        
+        new_head = asyncio.Event()
         try:
-            w3 = Web3(Web3.HTTPProvider(rpc, request_kwargs={"timeout": 10}))
-            if w3.is_connected():
-                print(f"✅ Connected to {rpc}")
-                print(f"   Chain ID: {w3.eth.chain_id}, Block: {w3.eth.block_number}")
-                break
-        except Exception as e:
-            print(f"❌ Failed {rpc}: {e}")
-            w3 = None
-    
-    if not w3:
-        print("💀 Could not connect to any Polygon RPC. Exiting.")
-        sys.exit(1)
-    
-    # Load existing events for stats continuity
-    stats = NonceStats()
-    if EVENTS_FILE.exists():
-        count = 0
-        for line in open(EVENTS_FILE):
-            try:
-                ev = json.loads(line.strip())
-                stats.add(ev)
-                count += 1
-            except Exception:
-                pass
-        if count:
-            print(f"📂 Loaded {count} existing events from {EVENTS_FILE.name}")
-    
-    print(f"\n🚀 Monitoring... polling every {POLL_INTERVAL}s for incrementNonce calls\n")
-    
-    await asyncio.gather(
-        poll_blocks(w3, stats),
-        print_stats_periodically(stats),
-    )
-
+            await asyncio.gather(
+                watch_heads(new_head),
+                poll_blocks(w3, stats, new_head),
+                print_stats_periodically(stats),
+            )
+        finally:
+            save_stats(stats)
+            if _events_fh is not None:
+                _events_fh.close()
 
 if __name__ == "__main__":
-    # Unbuffered output
-    import functools
-    print = functools.partial(print, flush=True)
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -67,17 +67,26 @@ NEW_EXPLOITER            — First-time caller detected (info)
 import json
 import logging
 import os
+import queue
+import selectors
 import socket
 import threading
 import time
 from datetime import datetime, timezone
 from typing import Callable, Optional
 
+try:
+    import orjson
+except ImportError:  # optional — faster alert serialization
+    orjson = None  # type: ignore[assignment]
+
 logger = logging.getLogger("nonce_guard.signal")
 
 ALERT_VERSION = 1
 ALERTS_FILE = os.path.join(os.path.dirname(__file__), "data", "alerts.jsonl")
 SOCKET_PATH = "/tmp/nonce-guard.sock"
+SOCKET_MAX_BUFFER = 1 << 20   # unsent bytes a socket client may fall behind before it is dropped
+WEBHOOK_QUEUE_SIZE = 1000  # alerts waiting for the webhook worker before new ones are dropped
 
 # Alert codes
 NONCE_INCREMENT = "NONCE_INCREMENT"
@@ -108,6 +117,16 @@ def make_alert(
     }
 
 
+def _alert_line(alert: dict) -> bytes:
+    """Serialize an alert as one JSONL line."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(alert, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass  # e.g. an int beyond 64 bits
+    return (json.dumps(alert) + "\n").encode()
+
+
 class AlertBus:
     """
     Central alert dispatcher. Write once, deliver everywhere.
@@ -135,9 +154,15 @@ class AlertBus:
         self.socket_path = socket_path
         self.webhook_url = webhook_url
         self.stdout = stdout
-        self._subscribers: list[Callable] = []
-        self._socket_clients: list[socket.socket] = []
+        self._subscribers: tuple[Callable, ...] = ()  # copy-on-write: emit() reads it without the lock
+        self._socket_clients: dict[socket.socket, bytearray] = {}  # client -> unsent bytes
+        self._dead_clients: list[socket.socket] = []  # dropped clients the socket thread still has to close
+        self._wake_r: Optional[socket.socket] = None  # socketpair that wakes the socket thread
+        self._wake_w: Optional[socket.socket] = None
         self._lock = threading.Lock()
+        self._fd: Optional[int] = None  # alerts file, opened O_APPEND on first write
+        self._file_lock = threading.Lock()
+        self._webhook_q: Optional[queue.Queue] = None
 
         if file:
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
@@ -145,97 +170,195 @@ class AlertBus:
         if socket_enabled:
             self._start_socket_server()
 
+        if webhook_url:
+            self._webhook_q = queue.Queue(maxsize=WEBHOOK_QUEUE_SIZE)
+            threading.Thread(target=self._webhook_worker, args=(self._webhook_q, webhook_url), daemon=True).start()
+
     def subscribe(self, callback: Callable):
         """Register an in-process callback for alerts."""
         with self._lock:
-            self._subscribers.append(callback)
+            self._subscribers = self._subscribers + (callback,)
 
     def unsubscribe(self, callback: Callable):
         with self._lock:
-            self._subscribers = [s for s in self._subscribers if s != callback]
+            self._subscribers = tuple(s for s in self._subscribers if s != callback)
 
     def emit(self, code: str, severity: str, source: str, data: dict):
         """Emit an alert to all configured outputs."""
         alert = make_alert(code, severity, source, data)
+        line = _alert_line(alert)  # serialized once, shared by every output
 
         # File output
         if self.file:
             try:
-                with open(self.file_path, "a") as f:
-                    f.write(json.dumps(alert) + "\n")
+                self._write_file(line)
             except Exception as e:
                 logger.error(f"Failed to write alert to file: {e}")
 
         # Stdout
         if self.stdout:
-            print(json.dumps(alert), flush=True)
+            print(line[:-1].decode(), flush=True)
 
         # In-process subscribers
-        with self._lock:
-            for cb in self._subscribers:
-                try:
-                    cb(alert)
-                except Exception as e:
-                    logger.error(f"Subscriber error: {e}")
+        for cb in self._subscribers:
+            try:
+                cb(alert)
+            except Exception as e:
+                logger.error(f"Subscriber error: {e}")
 
         # Unix socket clients
-        self._broadcast_socket(alert)
+        self._broadcast_socket(line)
 
-        # Webhook
-        if self.webhook_url:
-            self._send_webhook(alert)
+        # Webhook (delivered by a background thread)
+        webhook_q = self._webhook_q
+        if webhook_q is not None:
+            self._send_webhook(webhook_q, line)
 
         return alert
 
+    def _write_file(self, line: bytes):
+        """Append one line with a single O_APPEND write — atomic against other writers, visible to tailers at once.
+
+        The write holds _file_lock so close() cannot close (or let the OS reuse) the fd mid-write.
+        """
+        with self._file_lock:
+            if self._fd is None:
+                self._fd = os.open(self.file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o644)
+            os.write(self._fd, line)
+
+    def close(self):
+        """Close the alerts file."""
+        with self._file_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
     def _start_socket_server(self):
-        """Start Unix socket server in background thread."""
+        """Start Unix socket server in background thread.
+
+        The same thread flushes clients that could not take a whole alert when it was
+        emitted, so a slow reader never blocks emit(). It sleeps in select() until a
+        client connects, a backlog drains, or emit() wakes it through a socketpair.
+        Only this thread closes client sockets, so the selector never holds a stale fd.
+        """
         if os.path.exists(self.socket_path):
             os.unlink(self.socket_path)
 
+        wake_r, wake_w = socket.socketpair()
+        wake_r.setblocking(False)
+        wake_w.setblocking(False)
+        self._wake_r, self._wake_w = wake_r, wake_w
+
         def _server():
             srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
             srv.bind(self.socket_path)
             srv.listen(5)
             logger.info(f"Alert socket listening on {self.socket_path}")
+            sel = selectors.DefaultSelector()
+            sel.register(srv, selectors.EVENT_READ)
+            sel.register(wake_r, selectors.EVENT_READ)
+            watched: set[socket.socket] = set()
             while True:
-                try:
-                    client, _ = srv.accept()
-                    with self._lock:
-                        self._socket_clients.append(client)
-                    logger.info("New socket client connected")
-                except Exception as e:
-                    logger.error(f"Socket accept error: {e}")
+                with self._lock:
+                    dead, self._dead_clients = self._dead_clients, []
+                    pending = {c for c, buf in self._socket_clients.items() if buf}
+                for c in dead:
+                    if c in watched:
+                        sel.unregister(c)
+                        watched.discard(c)
+                    c.close()
+                for c in watched - pending:
+                    sel.unregister(c)
+                for c in pending - watched:
+                    sel.register(c, selectors.EVENT_WRITE)
+                watched = pending
+
+                for key, _ in sel.select():
+                    if key.fileobj is srv:
+                        try:
+                            client, _ = srv.accept()
+                            client.setblocking(False)
+                            with self._lock:
+                                self._socket_clients[client] = bytearray()
+                            logger.info("New socket client connected")
+                        except Exception as e:
+                            logger.error(f"Socket accept error: {e}")
+                    elif key.fileobj is wake_r:
+                        try:
+                            while wake_r.recv(4096):
+                                pass
+                        except BlockingIOError:
+                            pass
+                    else:
+                        with self._lock:
+                            if key.fileobj in self._socket_clients:
+                                self._flush_client(key.fileobj)
 
         t = threading.Thread(target=_server, daemon=True)
         t.start()
 
-    def _broadcast_socket(self, alert: dict):
-        """Send alert to all connected socket clients."""
+    def _wake_server(self):
+        """Make the socket thread re-check backlogs and dropped clients."""
+        try:
+            self._wake_w.send(b"\0")
+        except BlockingIOError:
+            pass  # a wake-up is already pending
+
+    def _flush_client(self, client: socket.socket):
+        """Send as much of a client's backlog as it will take now. Caller holds _lock."""
+        buf = self._socket_clients[client]
+        try:
+            sent = client.send(buf)
+        except BlockingIOError:
+            return
+        except OSError:
+            self._drop_client(client)
+            return
+        del buf[:sent]
+
+    def _drop_client(self, client: socket.socket):
+        """Stop sending to a client; the socket thread closes it. Caller holds _lock."""
+        del self._socket_clients[client]
+        self._dead_clients.append(client)
+
+    def _broadcast_socket(self, msg: bytes):
+        """Queue an alert line for every socket client and send what each will take without blocking."""
         if not self._socket_clients:
             return
-        msg = (json.dumps(alert) + "\n").encode()
-        dead = []
+        wake = False
         with self._lock:
-            for client in self._socket_clients:
-                try:
-                    client.sendall(msg)
-                except Exception:
-                    dead.append(client)
-            for d in dead:
-                self._socket_clients.remove(d)
-
-    def _send_webhook(self, alert: dict):
-        """POST alert to webhook URL."""
+            for client, buf in list(self._socket_clients.items()):
+                if len(buf) + len(msg) > SOCKET_MAX_BUFFER:
+                    logger.warning("Socket client too slow — disconnecting")
+                    self._drop_client(client)
+                    wake = True
+                    continue
+                was_empty = not buf
+                buf += msg
+                self._flush_client(client)
+                if client not in self._socket_clients or (was_empty and buf):
+                    wake = True
+        if wake:
+            self._wake_server()
+
+    def _send_webhook(self, webhook_q: queue.Queue, body: bytes):
+        """Queue an already-serialized alert for the webhook worker."""
         try:
-            import requests
-            requests.post(
-                self.webhook_url,
-                json=alert,
-                timeout=5,
-                headers={"Content-Type": "application/json"},
-            )
-        except Exception as e:
-            logger.error(f"Webhook error: {e}")
+            webhook_q.put_nowait(body)
+        except queue.Full:
+            logger.warning("Webhook queue full — alert dropped")
+
+    def _webhook_worker(self, webhook_q: queue.Queue, url: str):
+        """POST queued alerts to url over one keep-alive session."""
+        import requests
+        session = requests.Session()
+        session.headers["Content-Type"] = "application/json"
+        while True:
+            body = webhook_q.get()
+            try:
+                session.post(url, data=body, timeout=5)
+            except Exception as e:
+                logger.error(f"Webhook error: {e}")
 
 
 # Convenience: module-level default bus (lazy init)